@@ -0,0 +1,170 @@
+from Bittrex import Bittrex, API_URL, RETRY_STATUS
+import aiohttp
+import asyncio
+import time
+
+
+
+
+class RateLimiter():
+	"""
+	Token bucket for keeping requests under the exchange limits.
+	Tokens refill at a steady rate up to a burst size and
+	each request waits until it can take one.
+	"""
+
+	def __init__(self, rate, burst = None):
+		"""
+		:param rate: <float> Requests allowed per second
+		:param burst: <int> Requests allowed at once after being idle (defaults to rate)
+		"""
+
+		self.rate = rate
+		self.burst = burst or max(1, int(rate))
+		self.tokens = self.burst
+		self.updated = time.monotonic()
+		self.lock = asyncio.Lock()
+
+	async def acquire(self):
+		"""
+		Wait until a request is allowed to go out
+		"""
+
+		async with self.lock:
+			while True:
+				now = time.monotonic()
+				self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+				self.updated = now
+
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+
+				await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+
+
+class AsyncBittrex(Bittrex):
+	"""
+	Used for requesting Bittrex without blocking.
+	Has the same methods as Bittrex but each one returns a coroutine, so
+	many markets can be polled at once with asyncio.gather or get_many.
+	"""
+
+	def __init__(self, secrets, concurrency = 10, rate = 10, timeout = 10, retries = 3, backoff = .5, api_url = API_URL):
+		"""
+		:param secrets: <dict> Api key and secret under 'bittrex'
+		:param concurrency: <int> Most requests allowed in flight at once
+		:param rate: <float> Most requests sent per second
+		:param timeout: <float> Seconds to wait on each request
+		:param retries: <int> Times to retry a failed request
+		:param backoff: <float> Seconds before the first retry, doubled after each one
+		:param api_url: <str> Where to send requests (ex: a local stand-in server for testing)
+		"""
+
+		super().__init__(secrets, poolSize = concurrency, timeout = timeout, retries = retries, backoff = backoff, api_url = api_url)
+
+		self.concurrency = concurrency
+		self.limiter = RateLimiter(rate)
+		self.semaphore = asyncio.Semaphore(concurrency)
+
+		# Created on first request so it belongs to the running event loop
+		self.client = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		await self.close()
+
+	async def close(self):
+		"""
+		Close the connections held open to Bittrex
+		"""
+
+		if self.client is not None:
+			await self.client.close()
+			self.client = None
+
+	async def api_request(self, method, options = None):
+		"""
+		Sends request to Bittrex api with the given method and options.
+		Waits for a free slot under the concurrency and rate limits first.
+		Retries the same way as Bittrex.api_request.
+
+		:param method: <str> Api request to be sent
+		:param options: <dict> Additional options for request
+		:return: <dict> JSON response from Bittrex
+		"""
+
+		if self.client is None:
+			self.client = aiohttp.ClientSession(connector = aiohttp.TCPConnector(limit = self.concurrency),
+												timeout = aiohttp.ClientTimeout(total = self.timeout))
+
+		async with self.semaphore:
+			start = time.perf_counter()
+			attempt = 0
+
+			while True:
+				await self.limiter.acquire()
+
+				# Sign every attempt so each one gets a fresh nonce
+				request_url, headers = self.build_request(method, options)
+
+				try:
+					async with self.client.get(request_url, headers = headers) as response:
+						if response.status not in RETRY_STATUS or method in self.order_set or attempt >= self.retries:
+							result = await response.json(content_type = None)
+							break
+
+				except aiohttp.ClientConnectorError:
+					if attempt >= self.retries:
+						raise
+
+				except (aiohttp.ClientError, asyncio.TimeoutError):
+					if method in self.order_set or attempt >= self.retries:
+						raise
+
+				await asyncio.sleep(self.backoff * 2 ** attempt)
+				attempt += 1
+
+			self.record_latency(method, time.perf_counter() - start)
+
+		return result
+
+	async def get_many(self, method, optionsList):
+		"""
+		Send the same request for many options at once
+
+		:param method: <str> Api request to be sent
+		:param optionsList: <list> Options for each request
+		:return: <list> JSON responses in the same order as optionsList
+		"""
+
+		return await asyncio.gather(*[self.api_request(method, options) for options in optionsList])
+
+	async def get_tickers(self, markets):
+		"""
+		Used to get the current tick values for many markets at once.
+
+		:param markets: <list> String literals for the markets (ex: BTC-LTC)
+		:return: <dict> Market to current values
+		"""
+
+		responses = await self.get_many('getticker', [{'market': market} for market in markets])
+
+		return {market: response['result'] for market, response in zip(markets, responses)}
+
+	async def get_orderbooks(self, markets, depth_type):
+		"""
+		Used to get the orderbooks for many markets at once.
+
+		:param markets: <list> String literals for the markets (ex: BTC-LTC)
+		:param depth_type: <str> buy, sell or both
+		:return: <dict> Market to orderbook
+		"""
+
+		responses = await self.get_many('getorderbook', [{'market': market, 'type': depth_type} for market in markets])
+
+		return {market: response['result'] for market, response in zip(markets, responses)}
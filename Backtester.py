@@ -0,0 +1,302 @@
+import numpy as np
+
+# Fee Bittrex takes on each side of a trade
+FEE = .0025
+
+BUY = 1
+SELL = -1
+
+
+
+
+def crossover_signal(prices, average):
+	"""
+	Signal of the trailing average strategy: buy while the price is below
+	the average, sell while it is above.
+
+	:param prices: <ndarray> Price for each row
+	:param average: <ndarray> Moving average for each row (NaN while warming up)
+	:return: <ndarray> BUY, SELL or 0 for each row (NaN averages never trade)
+	"""
+
+	return (prices < average).astype(np.int8) - (prices > average).astype(np.int8)
+
+
+def signal_trades(signal):
+	"""
+	Find every row where a signal trades. A buy signal only trades when not
+	holding and a sell signal only when holding. Starts out not holding,
+	so the first trade is always a buy.
+
+	:param signal: <ndarray> BUY, SELL or 0 for each row
+	:return: <ndarray>, <ndarray> Row numbers of the trades and their sides (BUY or SELL)
+	"""
+
+	rows = np.flatnonzero(signal)
+	sides = signal[rows]
+
+	# A signal only trades when it is different from the last one that could have,
+	# pretend the row before the data was a sell since we start out not holding
+	previous = np.concatenate(([SELL], sides[:-1]))
+	trades = sides != previous
+
+	return rows[trades], sides[trades]
+
+
+def crossover_trades(prices, average):
+	"""
+	Find every row where the trailing average strategy trades.
+	Buy when the price drops below the average and not holding,
+	sell when the price rises above the average and holding.
+
+	:param prices: <ndarray> Price for each row
+	:param average: <ndarray> Moving average for each row (NaN while warming up)
+	:return: <ndarray>, <ndarray> Row numbers of the trades and their sides (BUY or SELL)
+	"""
+
+	return signal_trades(crossover_signal(prices, average))
+
+
+def window_metrics(equity, trades, periodsPerYear = None):
+	"""
+	Performance of many equity curves at once.
+
+	:param equity: <ndarray> Equity curves along the last axis
+	:param trades: <ndarray> Number of trades of each curve
+	:param periodsPerYear: <float> Rows in a year, to annualize the Sharpe ratio (defaults to per row)
+	:return: <dict> return, drawdown (largest fall from a peak as a fraction), sharpe and trades arrays
+	"""
+
+	returns = np.diff(equity, axis = -1) / equity[..., :-1]
+	deviation = returns.std(axis = -1, ddof = 1)
+
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		sharpe = np.where(deviation > 0, returns.mean(axis = -1) / deviation, np.nan)
+
+	if periodsPerYear is not None:
+		sharpe = sharpe * np.sqrt(periodsPerYear)
+
+	return {'return': equity[..., -1] / equity[..., 0] - 1,
+			'drawdown': (1 - equity / np.maximum.accumulate(equity, axis = -1)).max(axis = -1),
+			'sharpe': sharpe,
+			'trades': np.asarray(trades)}
+
+
+
+
+class Backtester():
+	"""
+	Batched backtesting engine. Turns the buy/sell signals of a strategy
+	into positions and fills in one pass over NumPy arrays
+	instead of walking a DataFrame row by row.
+	"""
+
+	def __init__(self, times, prices, startingAmount, fee = FEE):
+		self.times = np.asarray(times)
+		self.prices = np.asarray(prices, dtype = np.float64)
+		self.wallet = startingAmount
+		self.fee = fee
+
+
+	def simulate(self, signal):
+		"""
+		Trade the given signal without building the ledger.
+		Only the trades themselves are walked in Python (so the wallet math matches the
+		old row by row loop to the last bit), everything per row is done with arrays.
+
+		:param signal: <ndarray> BUY, SELL or 0 for each row
+		:return: <dict> rows, sides, fills, coins traded and wallets of each trade,
+				 equity: <ndarray> Value of wallet and coins after each row,
+				 position: <ndarray> 1 for every row holding coins, 0 otherwise,
+				 final: <float> Value of wallet and coins at the last price
+		"""
+
+		prices = self.prices
+		rows, sides = signal_trades(np.asarray(signal))
+		fills = prices[rows].tolist()
+
+		buyFee = 1 + self.fee
+		sellFee = 1 - self.fee
+
+		wallets = []
+		coins = []
+		traded = []
+		wallet = self.wallet
+		coinCount = 0
+
+		# Wallet after each trade depends on the one before it
+		for side, price in zip(sides.tolist(), fills):
+			if side == BUY:
+				numCoins = wallet / (price * buyFee)
+				wallet -= (numCoins * price)
+				coinCount = numCoins
+				traded.append(numCoins)
+			else:
+				wallet += (price * coinCount * sellFee)
+				traded.append(coinCount)
+				coinCount = 0
+
+			wallets.append(wallet)
+			coins.append(coinCount)
+
+		# Spread the state after each trade over the rows until the next trade
+		last = np.searchsorted(rows, np.arange(len(prices)), side = 'right') - 1
+		walletCurve = np.append(wallets, self.wallet)[last]
+		coinCurve = np.append(coins, 0.)[last]
+
+		# When done calculate number of coins finished with
+		finalVal = wallet + (coinCount * prices[-1])
+
+		return {'rows': rows, 'sides': sides, 'fills': fills, 'traded': traded, 'wallets': wallets,
+				'equity': walletCurve + coinCurve * prices, 'position': (coinCurve > 0).astype(np.int8),
+				'final': finalVal}
+
+
+	def run_signal(self, signal):
+		"""
+		Backtest any strategy from its buy/sell signal.
+
+		:param signal: <ndarray> BUY, SELL or 0 for each row
+		:return: <dict> final: <float> Value of wallet and coins at the last price,
+						ledger: <DataFrame> One row per trade,
+						equity: <Series> Value of wallet and coins after each row,
+						position: <ndarray> 1 for every row holding coins, 0 otherwise
+		"""
+
+		# Backtest workers only need simulate, leave loading pandas until here
+		import pandas as pd
+
+		result = self.simulate(signal)
+		rows = result['rows']
+
+		ledger = pd.DataFrame({'Time': self.times[rows],
+								'Side': np.where(result['sides'] == BUY, 'B', 'S'),
+								'Price': result['fills'],
+								'Coins': result['traded'],
+								'Wallet': result['wallets']})
+
+		equity = pd.Series(result['equity'], index = self.times, name = 'Equity')
+
+		return {'final': result['final'], 'ledger': ledger, 'equity': equity, 'position': result['position']}
+
+
+	def run(self, average):
+		"""
+		Backtest the trailing average strategy against the given average.
+
+		:param average: <ndarray> Moving average for each row
+		:return: <dict> Same as run_signal
+		"""
+
+		return self.run_signal(crossover_signal(self.prices, np.asarray(average, dtype = np.float64)))
+
+
+
+
+class BatchRunner():
+	"""
+	Backtests many strategies over the same read-only prices in one pass.
+	Every strategy's signal is worked out once over the whole history, then
+	each window just trades its slice of it, starting out not holding.
+	Indicators only look back, so a window's signal never sees later prices.
+	"""
+
+	def __init__(self, times, prices, startingAmount, fee = FEE, periodsPerYear = None):
+		"""
+		:param times: <ndarray> Time of each row
+		:param prices: <ndarray> Price for each row
+		:param startingAmount: <float> Wallet each window starts with
+		:param fee: <float> Fee taken on each side of a trade
+		:param periodsPerYear: <float> Rows in a year, to annualize the Sharpe ratio
+		"""
+
+		self.times = np.asarray(times)
+		self.prices = np.array(prices, dtype = np.float64)
+		self.prices.flags.writeable = False
+		self.wallet = startingAmount
+		self.fee = fee
+		self.periodsPerYear = periodsPerYear
+
+
+	def signals(self, strategies):
+		"""
+		:param strategies: <list> Strategies to run
+		:return: <ndarray> Signal of each strategy, one row per strategy
+		"""
+
+		return np.array([strategy.signal(self.prices) for strategy in strategies], dtype = np.int8)
+
+
+	def evaluate(self, signals, starts, length):
+		"""
+		Trade every signal over every window.
+
+		:param signals: <ndarray> Signal of each strategy, one row per strategy
+		:param starts: <ndarray> First row of each window
+		:param length: <int> Rows in each window
+		:return: <dict> Metric name to array of one row per strategy and one column per window
+		"""
+
+		equity = np.empty((len(signals), len(starts), length))
+		trades = np.empty((len(signals), len(starts)), dtype = np.int64)
+
+		for w, start in enumerate(starts.tolist()):
+			backtester = Backtester(self.times[start:start + length], self.prices[start:start + length], self.wallet, self.fee)
+
+			for s, signal in enumerate(signals):
+				result = backtester.simulate(signal[start:start + length])
+				equity[s, w] = result['equity']
+				trades[s, w] = len(result['rows'])
+
+		return window_metrics(equity, trades, self.periodsPerYear)
+
+
+	def run(self, strategies, length = None, step = None):
+		"""
+		Backtest every strategy over rolling windows.
+
+		:param strategies: <list> Strategies to run
+		:param length: <int> Rows in each window (defaults to the whole history)
+		:param step: <int> Rows between window starts (defaults to length)
+		:return: <dict> return, drawdown, sharpe and trades arrays of one row per strategy
+				 and one column per window, start: <ndarray> Time each window starts
+		"""
+
+		length = len(self.prices) if length is None else length
+		starts = np.arange(0, len(self.prices) - length + 1, step or length)
+
+		result = self.evaluate(self.signals(strategies), starts, length)
+		result['start'] = self.times[starts]
+
+		return result
+
+
+	def walk_forward(self, strategies, train, test, step = None):
+		"""
+		Walk forward testing. In every window the strategy that returned the most
+		over the train rows is picked and then traded over the test rows after them.
+
+		:param strategies: <list> Strategies to choose between
+		:param train: <int> Rows to pick the strategy on
+		:param test: <int> Rows to trade the picked strategy on
+		:param step: <int> Rows between window starts (defaults to test)
+		:return: <dict> train and test: <dict> Metrics of every strategy in every window (see run),
+				 chosen: <ndarray> Strategy picked in each window,
+				 return, drawdown, sharpe and trades: <ndarray> Test metrics of the picked strategy,
+				 start: <ndarray> Time each test window starts
+		"""
+
+		signals = self.signals(strategies)
+		starts = np.arange(0, len(self.prices) - train - test + 1, step or test)
+
+		trained = self.evaluate(signals, starts, train)
+		tested = self.evaluate(signals, starts + train, test)
+
+		# Pick on return, every window starts with the same wallet
+		chosen = np.argmax(trained['return'], axis = 0)
+		columns = np.arange(len(starts))
+
+		result = {name: values[chosen, columns] for name, values in tested.items()}
+		result.update({'train': trained, 'test': tested, 'chosen': chosen, 'start': self.times[starts + train]})
+
+		return result
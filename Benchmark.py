@@ -0,0 +1,294 @@
+from Bittrex import Bittrex
+from DataGrabber import fetch_candles
+from Indicators import SMA, EMA, RSI, sma, ema, rsi
+from OrderBook import OrderBook
+from Tester import Tester
+import numpy as np
+import pandas as pd
+import subprocess
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+SECRETS = {'bittrex': {'api_key': 'benchmark', 'api_secret': 'benchmark'}}
+
+# What a backtest worker, the trader and the command line each import on start up
+STARTUP_IMPORTS = {'backtest_worker': 'import Backtester, Strategies', 'sweeper': 'import Sweeper',
+					'trader': 'import Trader', 'cli': 'import BitTrading'}
+
+
+
+
+def synthetic_ticks(rows, seed = 0):
+	"""
+	Random walk candles the way GetTicks returns them.
+
+	:param rows: <int> Number of candles
+	:param seed: <int> Random seed so runs are comparable
+	:return: <list> Candle dicts
+	"""
+
+	rng = np.random.default_rng(seed)
+	close = 1e-4 * np.exp(np.cumsum(rng.normal(0, .002, rows)))
+	open = np.concatenate(([close[0]], close[:-1]))
+	spread = np.abs(rng.normal(0, .001, rows)) * close
+	volume = rng.exponential(1000, rows)
+	times = (np.datetime64('2018-01-01T00:00:00') + np.arange(rows) * np.timedelta64(5, 'm')).astype(str)
+
+	return [{'O': o, 'H': h, 'L': l, 'C': c, 'V': v, 'BV': v * c, 'T': t}
+			for o, h, l, c, v, t in zip(open.tolist(), (np.maximum(open, close) + spread).tolist(),
+										(np.minimum(open, close) - spread).tolist(), close.tolist(),
+										volume.tolist(), times.tolist())]
+
+
+def synthetic_book(levels, seed = 0):
+	"""
+	Random order book the way getorderbook returns both sides.
+
+	:param levels: <int> Number of levels on each side
+	:param seed: <int> Random seed so runs are comparable
+	:return: <dict> buy and sell lists of Quantity and Rate
+	"""
+
+	rng = np.random.default_rng(seed)
+	steps = np.cumsum(rng.exponential(1e-8, levels))
+
+	return {'buy': [{'Quantity': q, 'Rate': r} for q, r in zip(rng.exponential(500, levels).tolist(), (1e-4 - steps).tolist())],
+			'sell': [{'Quantity': q, 'Rate': r} for q, r in zip(rng.exponential(500, levels).tolist(), (1e-4 + steps).tolist())]}
+
+
+
+
+class ReplayBittrex(Bittrex):
+	"""
+	Bittrex client that answers from prepared results instead of the network,
+	so the benchmarks only time our own code.
+	"""
+
+	def __init__(self, ticks = None, book = None):
+		super().__init__(SECRETS)
+		self.ticks = ticks
+		self.book = book
+
+	def get_ticks(self, market = "", tickInterval = ""):
+		return {'success': True, 'result': self.ticks}
+
+	def get_orderbook(self, market, depth_type):
+		return {'success': True, 'result': self.book}
+
+
+
+
+class Benchmark():
+	"""
+	Reproducible timings of the data loading, indicator, backtest, order book
+	and request signing paths on synthetic data, plus how long each entry
+	point takes to start in a fresh interpreter. Results are saved as JSON
+	with the commit they ran on so versions can be compared.
+	"""
+
+	def __init__(self, sizes = (10**4, 10**5, 10**6), repeat = 3):
+		"""
+		:param sizes: <list> Rows (or book levels) to run each benchmark at
+		:param repeat: <int> Times to run each benchmark, the best run is kept
+		"""
+
+		self.sizes = [int(size) for size in sizes]
+		self.repeat = repeat
+		self.results = []
+
+
+	def time(self, name, size, function, count = None):
+		"""
+		Run a function repeat times and record the best and median time.
+
+		:param name: <str> Name of the benchmark
+		:param size: <int> Rows or levels it ran over
+		:param function: <function> Called with no arguments
+		:param count: <int> Operations (rows, queries, requests) each call does, 0 to leave out the
+					  time per operation (defaults to size)
+		:return: <dict> The recorded result
+		"""
+
+		count = size if count is None else count
+
+		timings = []
+		for _ in range(self.repeat):
+			start = time.perf_counter()
+			function()
+			timings.append(time.perf_counter() - start)
+
+		result = {'name': name, 'size': size, 'best': min(timings), 'median': float(np.median(timings)),
+				'count': count, 'per_op': min(timings) / count if count else None}
+		self.results.append(result)
+
+		perOp = f"  {result['per_op'] * 1e9:.1f}ns/op" if count else ''
+		print(f"{name:<24}{size:>10}  {result['best']:.6f}s{perOp}")
+
+		return result
+
+
+	def bench_parsing(self, size):
+		"""
+		DataGrabber.get_data parsing of GetTicks results
+		"""
+
+		bittrex = ReplayBittrex(ticks = synthetic_ticks(size))
+
+		self.time('parse_ticks', size, lambda: fetch_candles(bittrex, 'BTC-BENCH', 'fiveMin', ['O']))
+		self.time('parse_ticks_ohlcv', size, lambda: fetch_candles(bittrex, 'BTC-BENCH', 'fiveMin', ['O', 'H', 'L', 'C', 'V']))
+
+
+	def bench_backtest(self, size):
+		"""
+		Tester.trailingAverage over synthetic candles
+		"""
+
+		data = fetch_candles(ReplayBittrex(ticks = synthetic_ticks(size)), 'BTC-BENCH', 'fiveMin', ['O'])
+
+		self.time('trailing_average', size, lambda: Tester(data.copy(), 1.).trailingAverage(12))
+
+
+	def bench_indicators(self, size):
+		"""
+		Batch indicators over a whole array and tick updates one value at a time
+		"""
+
+		prices = np.array([tick['C'] for tick in synthetic_ticks(size)])
+
+		self.time('sma_batch', size, lambda: sma(prices, 20))
+		self.time('ema_batch', size, lambda: ema(prices, 20))
+		self.time('rsi_batch', size, lambda: rsi(prices, 14))
+
+		# Tick updates are much slower per row, cap them so big sizes stay quick
+		ticks = prices[:min(size, 10**5)].tolist()
+		for indicator in (SMA, EMA, RSI):
+			def run(indicator = indicator):
+				state = indicator(20)
+				for price in ticks:
+					state.update(price)
+			self.time(indicator.__name__.lower() + '_tick', len(ticks), run)
+
+
+	def bench_orderbook(self, size):
+		"""
+		Building the order book from a getorderbook snapshot and querying it
+		"""
+
+		book = synthetic_book(min(size, 10**6))
+		levels = len(book['buy'])
+		orderBook = OrderBook()
+
+		self.time('orderbook_update', levels, lambda: orderBook.update(book))
+		# Each query is a depth_to, a vwap and a levels call
+		self.time('orderbook_queries', levels, lambda: [(orderBook.depth_to('buy', 9.9e-5), orderBook.vwap('sell', 1e4),
+														orderBook.levels('buy', 9.9e-5)) for _ in range(1000)], 1000)
+
+
+	def bench_signing(self, size):
+		"""
+		Bittrex.build_request url building and HMAC signing
+		"""
+
+		bittrex = Bittrex(SECRETS)
+		calls = min(size, 10**5)
+		options = {'market': 'BTC-LTC', 'quantity': 1.5, 'rate': 1e-4}
+
+		self.time('sign_request', calls, lambda: [bittrex.build_request('buylimit', options) for _ in range(calls)])
+
+
+	def bench_startup(self):
+		"""
+		Cold start of a fresh interpreter importing each entry point
+		"""
+
+		here = os.path.dirname(os.path.abspath(__file__))
+
+		for name, imports in STARTUP_IMPORTS.items():
+			self.time('startup_' + name, 1, lambda: subprocess.run([sys.executable, '-c', imports], cwd = here, check = True), 0)
+
+
+	def run(self, only = None):
+		"""
+		Run every benchmark at every size, and the start up times once.
+
+		:param only: <list> Benchmark names to run (parsing, backtest, indicators, orderbook, signing, startup)
+		:return: <list> Recorded results
+		"""
+
+		benches = ['parsing', 'backtest', 'indicators', 'orderbook', 'signing']
+
+		for size in self.sizes:
+			for name in benches:
+				if only is None or name in only:
+					getattr(self, 'bench_' + name)(size)
+
+		if only is None or 'startup' in only:
+			self.bench_startup()
+
+		return self.results
+
+
+	def save(self, path = './benchmarks'):
+		"""
+		Save the results with what they ran on.
+
+		:param path: <str> Folder to save into
+		:return: <str> File the results were saved to
+		"""
+
+		try:
+			commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True).stdout.strip() or None
+		except OSError:
+			commit = None
+
+		os.makedirs(path, exist_ok = True)
+		stamp = time.strftime('%Y%m%d%H%M%S')
+		location = os.path.join(path, stamp + '.json')
+
+		with open(location, 'w') as file:
+			json.dump({'commit': commit, 'time': stamp, 'python': platform.python_version(),
+						'numpy': np.__version__, 'pandas': pd.__version__, 'results': self.results}, file, indent = 1)
+
+		return location
+
+
+	def compare(self, location):
+		"""
+		Compare against earlier saved results.
+
+		:param location: <str> JSON file from an earlier run
+		:return: <DataFrame> Best times of both runs and how many times slower this one is
+		"""
+
+		with open(location) as file:
+			old = pd.DataFrame(json.load(file)['results'])
+
+		new = pd.DataFrame(self.results)
+		both = new.merge(old, on = ['name', 'size'], suffixes = ('', '_old'))[['name', 'size', 'best', 'best_old']]
+		both['ratio'] = both['best'] / both['best_old']
+
+		return both
+
+
+
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = 'Benchmark the data, indicator, backtest, order book, signing and start up paths')
+	parser.add_argument('--sizes', type = float, nargs = '+', default = [1e4, 1e5, 1e6], help = 'rows to run at (up to 1e7)')
+	parser.add_argument('--repeat', type = int, default = 3)
+	parser.add_argument('--only', nargs = '+', help = 'parsing, backtest, indicators, orderbook, signing or startup')
+	parser.add_argument('--out', default = './benchmarks', help = 'folder to save results to')
+	parser.add_argument('--compare', help = 'earlier results file to compare against')
+	args = parser.parse_args()
+
+	benchmark = Benchmark(args.sizes, args.repeat)
+	benchmark.run(args.only)
+	print('Saved to', benchmark.save(args.out))
+
+	if args.compare:
+		print(benchmark.compare(args.compare))
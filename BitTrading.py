@@ -0,0 +1,136 @@
+"""
+Command line entry point for the trading tools:
+
+	python BitTrading.py fetch BTC-LTC BTC-RVN --interval fiveMin
+	python BitTrading.py backtest BTC-RVN --windows 7 12 20 --walk-forward 2000 500
+	python BitTrading.py trade BTC-RVN BTC-LTC --num 7
+	python BitTrading.py graph BTC-LTC --interval day
+
+Each command imports what it needs when it runs, so starting up only
+costs argparse and the modules of the command being used.
+"""
+
+import argparse
+
+
+
+
+def fetch(args):
+	"""
+	Bring the local candle store of every market up to date
+	"""
+
+	from Bittrex import Bittrex, load_secrets
+	from CandleStore import CandleStore
+
+	store = CandleStore(Bittrex(load_secrets(args.secrets)), args.store)
+
+	for market in args.markets:
+		print(market, store.refresh(market, args.interval), 'new candles')
+
+
+def backtest(args):
+	"""
+	Backtest trailing averages of every window on one market
+	"""
+
+	from Bittrex import Bittrex, load_secrets
+	from CandleStore import CandleStore
+	from DataGrabber import fetch_candles
+	from Backtester import BatchRunner
+	from Strategies import TrailingAverage
+	import pandas as pd
+
+	bittrex = Bittrex(load_secrets(args.secrets))
+	data = fetch_candles(bittrex, args.market, args.interval, [args.price], CandleStore(bittrex, args.store))
+
+	runner = BatchRunner(data.index.values, data.iloc[:,0].values, args.amount)
+	strategies = [TrailingAverage(window) for window in args.windows]
+	names = [repr(strategy) for strategy in strategies]
+
+	if args.walk_forward is None:
+		result = runner.run(strategies)
+		print(pd.DataFrame({name: result[name][:, 0] for name in ('return', 'drawdown', 'sharpe', 'trades')}, index = names))
+	else:
+		result = runner.walk_forward(strategies, *args.walk_forward)
+		print(pd.DataFrame({'Strategy': [names[i] for i in result['chosen']],
+							'Return': result['return'], 'Drawdown': result['drawdown'],
+							'Sharpe': result['sharpe'], 'Trades': result['trades']}, index = result['start']))
+
+
+def trade(args):
+	"""
+	Live trade the trailing average strategy on one or many markets
+	"""
+
+	from Bittrex import load_secrets
+	from EventLog import EventLog
+
+	secrets = load_secrets(args.secrets)
+
+	with EventLog(args.log) as log:
+		if len(args.markets) == 1:
+			from Trader import Trader
+			Trader(secrets, args.markets[0], events = log).trailing_average(args.num, args.interval)
+		else:
+			from Portfolio import Portfolio
+			Portfolio(secrets, args.markets, events = log).trailing_average(args.num, args.interval)
+
+
+def graph(args):
+	"""
+	Plot the price history of one market
+	"""
+
+	from Bittrex import load_secrets
+	from Grapher import Grapher
+
+	Grapher(load_secrets(args.secrets), args.market, args.interval, args.price, args.store).graph_basic()
+
+
+def parser():
+	"""
+	:return: <ArgumentParser> Parser of every command
+	"""
+
+	main = argparse.ArgumentParser(description = 'Fetch candles, backtest, trade and graph Bittrex markets')
+	main.add_argument('--secrets', default = './database/secrets.json', help = 'JSON file holding the Bittrex api keys')
+	commands = main.add_subparsers(dest = 'command', required = True)
+
+	command = commands.add_parser('fetch', help = 'update the local candle store')
+	command.add_argument('markets', nargs = '+')
+	command.set_defaults(run = fetch)
+
+	command = commands.add_parser('backtest', help = 'backtest trailing averages')
+	command.add_argument('market')
+	command.add_argument('--windows', type = int, nargs = '+', default = [7, 12, 20, 50])
+	command.add_argument('--price', default = 'C', choices = ['O', 'H', 'L', 'C'])
+	command.add_argument('--amount', type = float, default = .08, help = 'wallet to start with')
+	command.add_argument('--walk-forward', type = int, nargs = 2, metavar = ('TRAIN', 'TEST'),
+						help = 'pick the best window on TRAIN candles and trade it on the next TEST candles')
+	command.set_defaults(run = backtest)
+
+	command = commands.add_parser('trade', help = 'live trade the trailing average strategy')
+	command.add_argument('markets', nargs = '+')
+	command.add_argument('--num', type = int, default = 7, help = 'trailing average window')
+	command.add_argument('--log', default = 'TrailingAverage', help = 'name of the event log in ./log')
+	command.set_defaults(run = trade)
+
+	command = commands.add_parser('graph', help = 'plot a market')
+	command.add_argument('market')
+	command.add_argument('--price', default = 'O', choices = ['O', 'H', 'L', 'C'])
+	command.set_defaults(run = graph)
+
+	for command in commands.choices.values():
+		command.add_argument('--interval', default = 'fiveMin', help = 'oneMin, fiveMin, thirtyMin, hour or day')
+		command.add_argument('--store', default = './database/candles', help = 'folder of the local candle store')
+
+	return main
+
+
+
+
+if __name__ == '__main__':
+
+	args = parser().parse_args()
+	args.run(args)
@@ -1,9 +1,14 @@
 import requests
+import requests.adapters
 import time
 import json
 import urllib.parse
 import hmac
 import hashlib
+import threading
+from Instrumentation import INSTRUMENTS
+
+API_URL = 'https://bittrex.com'
 
 BUY_ORDERBOOK = 'buy'
 SELL_ORDERBOOK = 'sell'
@@ -22,6 +27,62 @@ ACCOUNT_SET = ['getbalances', 'getbalance',
 				'getorder', 'getorderhistory',
 				'getwithdrawalhistory', 'getdeposithistory']
 
+# Requests that could go through twice if retried after reaching Bittrex
+ORDER_SET = ['sellmarket', 'selllimit',
+				'buymarket', 'buylimit', 'withdraw']
+
+# Response codes worth retrying
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+SECRETS_PATH = './database/secrets.json'
+
+
+
+
+class Nonce():
+	"""
+	Strictly increasing millisecond nonces. Two requests in the same millisecond
+	get different nonces, and the count never goes back if the clock does.
+	"""
+
+	def __init__(self):
+		self.last = 0
+		self.lock = threading.Lock()
+
+	def next(self):
+		"""
+		:return: <int> Milliseconds since epoch, or one more than the last nonce when that is later
+		"""
+
+		with self.lock:
+			self.last = max(self.last + 1, int(time.time() * 1000))
+			return self.last
+
+
+# One nonce per api key, shared by every client using it (threads and event loops alike)
+NONCES = {}
+NONCES_LOCK = threading.Lock()
+
+
+def key_nonce(api_key):
+	"""
+	:param api_key: <str> Bittrex api key
+	:return: <Nonce> Nonce generator shared by every client of the key
+	"""
+
+	with NONCES_LOCK:
+		return NONCES.setdefault(api_key, Nonce())
+
+
+def load_secrets(path = SECRETS_PATH):
+	"""
+	:param path: <str> JSON file holding the api_key and api_secret under bittrex
+	:return: <dict> Secrets to give to Bittrex
+	"""
+
+	with open(path) as file:
+		return json.load(file)
+
 
 
 class Bittrex():
@@ -29,26 +90,54 @@ class Bittrex():
 	Used for requesting Bittrex
 	"""
 
-	def __init__(self, secrets):
+	def __init__(self, secrets, poolSize = 10, timeout = 10, retries = 3, backoff = .5, api_url = API_URL):
+		"""
+		:param secrets: <dict> Api key and secret under 'bittrex'
+		:param poolSize: <int> Number of kept-alive connections to hold open
+		:param timeout: <float> Seconds to wait on connecting and on each read
+		:param retries: <int> Times to retry a failed request
+		:param backoff: <float> Seconds before the first retry, doubled after each one
+		:param api_url: <str> Where to send requests (ex: a local stand-in server for testing)
+		"""
+
 		self.api_key = str(secrets['bittrex']['api_key'])
 		self.api_secret = str(secrets['bittrex']['api_secret'])
 		self.public_set = set(PUBLIC_SET)
 		self.market_set = set(MARKET_SET)
 		self.account_set = set(ACCOUNT_SET)
+		self.order_set = set(ORDER_SET)
+		self.timeout = timeout
+		self.retries = retries
+		self.backoff = backoff
+		self.api_url = api_url.rstrip('/')
+		self.nonce = key_nonce(self.api_key)
 
-	def api_request(self, method, options = None):
+		# Key set up once, copied for each request instead of hashing the secret every time
+		self.signer = hmac.new(self.api_secret.encode(), digestmod = hashlib.sha512)
+
+		# Reuse connections between calls instead of a new TCP+TLS handshake every time
+		self.session = requests.Session()
+		adapter = requests.adapters.HTTPAdapter(pool_connections = poolSize, pool_maxsize = poolSize)
+		self.session.mount('https://', adapter)
+		self.session.mount('http://', adapter)
+
+		# Method to [calls, total seconds, slowest seconds], requests can come from many threads
+		self.latency = {}
+		self.latencyLock = threading.Lock()
+
+	def build_request(self, method, options = None):
 		"""
-		Sends request to Bittrex api with the given method and options
+		Builds the signed url and headers for a request to the Bittrex api
 
 		:param method: <str> Api request to be sent
-		:param options: <str> Additional options for request
-		:return: <dict> JSON response from Bittrex
+		:param options: <dict> Additional options for request
+		:return: <str>, <dict> Request url and headers
 		"""
 
 		if not options:
 			options = {}
-		nonce = str(int(time.time() * 1000)) # Not needed at the moment but will be in the future
-		base_url = 'https://bittrex.com/api/v1.1/%s/'
+		nonce = str(self.nonce.next())
+		base_url = self.api_url + '/api/v1.1/%s/'
 		request_url = ''
 
 		#https://bittrex.com/api/v1.1/market/selllimit?apikey=API_KEY&market=BTC-LTC&quantity=1.2&rate=1.3
@@ -60,22 +149,89 @@ class Bittrex():
 		elif method in self.account_set:
 			request_url = (base_url % 'account') + method + '?apikey=' + self.api_key + "&nonce=" + nonce + '&'
 		else: # This is used for the historical data call. Does not follow standard call
-			request_url = ('https://bittrex.com/api/v2.0/%s/' % 'pub/market') + method + '?'
+			request_url = (self.api_url + '/api/v2.0/%s/' % 'pub/market') + method + '?'
 
 		# Add the additional options as url components	
 		request_url += urllib.parse.urlencode(options) 
 
 		# Create HMAC-SHA512 signing
-		signature = hmac.new(self.api_secret.encode(), request_url.encode(), hashlib.sha512).hexdigest()
+		signer = self.signer.copy()
+		signer.update(request_url.encode())
+		signature = signer.hexdigest()
 
 		# Create apisign header
 		headers = {'apisign': signature}
 
-		# Send request to Bittrex api
-		response = requests.get(request_url, headers = headers)
+		return request_url, headers
+
+	def api_request(self, method, options = None):
+		"""
+		Sends request to Bittrex api with the given method and options.
+		Failed requests are retried with backoff, except orders and withdrawals
+		are only retried when they never reached Bittrex so they can not go through twice.
+
+		:param method: <str> Api request to be sent
+		:param options: <dict> Additional options for request
+		:return: <dict> JSON response from Bittrex
+		"""
+
+		start = time.perf_counter()
+		attempt = 0
+
+		while True:
+			# Sign every attempt so each one gets a fresh nonce
+			request_url, headers = self.build_request(method, options)
+
+			try:
+				# Send request to Bittrex api
+				response = self.session.get(request_url, headers = headers, timeout = self.timeout)
+
+				if response.status_code not in RETRY_STATUS or method in self.order_set or attempt >= self.retries:
+					break
+
+			except requests.exceptions.ConnectTimeout:
+				if attempt >= self.retries:
+					raise
+
+			except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+				if method in self.order_set or attempt >= self.retries:
+					raise
+
+			time.sleep(self.backoff * 2 ** attempt)
+			attempt += 1
+
+		self.record_latency(method, time.perf_counter() - start)
 
 		return response.json()
 
+	def record_latency(self, method, seconds):
+		"""
+		Adds the time a request took to the stats of its endpoint
+
+		:param method: <str> Api request that was sent
+		:param seconds: <float> Time the request took including retries
+		"""
+
+		with self.latencyLock:
+			stats = self.latency.setdefault(method, [0, 0., 0.])
+			stats[0] += 1
+			stats[1] += seconds
+			stats[2] = max(stats[2], seconds)
+
+		# Feed the shared p50/p99 histograms when instrumentation is on
+		INSTRUMENTS.record('api.' + method, seconds)
+
+	def get_latency_stats(self):
+		"""
+		Used to see where time is spent talking to Bittrex
+
+		:return: <dict> Method to calls, total, mean and max seconds
+		"""
+
+		with self.latencyLock:
+			return {method: {'calls': calls, 'total': total, 'mean': total / calls, 'max': slowest}
+					for method, (calls, total, slowest) in self.latency.items()}
+
 	def get_markets(self):
 		"""
 		Used to get the open and available trading markets
@@ -259,4 +415,15 @@ class Bittrex():
 		:return: <dict> Historical data in JSON
 		"""
 
-		return self.api_request('GetTicks', {'marketName': market, 'tickInterval': tickInterval})
\ No newline at end of file
+		return self.api_request('GetTicks', {'marketName': market, 'tickInterval': tickInterval})
+
+	def get_latest_tick(self, market = "", tickInterval = ""):
+		"""
+		Used to get the most recent candle for market.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param tickInterval: <str> String literal time delta (ex: oneMin, fiveMin, thirtyMin, day, )
+		:return: <dict> Latest candle in JSON
+		"""
+
+		return self.api_request('GetLatestTick', {'marketName': market, 'tickInterval': tickInterval})
\ No newline at end of file
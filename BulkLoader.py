@@ -0,0 +1,191 @@
+from AsyncBittrex import AsyncBittrex
+from Bittrex import Bittrex, API_URL
+from CandleStore import parse_ticks
+from DataGrabber import NAMES
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import asyncio
+import json
+
+
+
+
+class LRUCache():
+	"""
+	Holds the most recently used items up to a fixed count,
+	dropping the least recently used one when full.
+	"""
+
+	def __init__(self, size):
+		self.size = size
+		self.items = OrderedDict()
+
+	def get(self, key):
+		"""
+		:param key: Key the item was stored under
+		:return: The item, None if it is not cached
+		"""
+
+		if key not in self.items:
+			return None
+
+		self.items.move_to_end(key)
+
+		return self.items[key]
+
+	def put(self, key, value):
+		"""
+		:param key: Key to store the item under
+		:param value: Item to store
+		"""
+
+		self.items[key] = value
+		self.items.move_to_end(key)
+
+		while len(self.items) > self.size:
+			self.items.popitem(last = False)
+
+
+
+
+class BulkLoader():
+	"""
+	Used to grab historical data for many markets at once.
+	Candles are downloaded concurrently under a rate limit, kept in an
+	in-memory LRU cache for the session, and lined up on one shared
+	time index for cross-market screening.
+	"""
+
+	def __init__(self, secrets, timeInterval, concurrency = 10, rate = 10, cacheSize = 512, bittrex = None, api_url = None):
+		"""
+		:param secrets: <dict> Bittrex api secrets
+		:param timeInterval: <str> String literal time delta (ex: oneMin, fiveMin, thirtyMin, day)
+		:param concurrency: <int> Most downloads in flight at once
+		:param rate: <float> Most requests sent per second
+		:param cacheSize: <int> Number of markets to keep in memory
+		:param bittrex: <Bittrex> Client to list the markets with (defaults to a new one)
+		:param api_url: <str> Where to send requests (defaults to the client's, ex: a Simulator's url)
+		"""
+
+		self.secrets = secrets
+		self.api_url = api_url or (bittrex.api_url if bittrex is not None else API_URL)
+		self.Bittrex = Bittrex(secrets, api_url = self.api_url) if bittrex is None else bittrex
+		self.timeInterval = timeInterval
+		self.concurrency = concurrency
+		self.rate = rate
+		self.cache = LRUCache(cacheSize)
+
+		# Market to error message of the downloads that failed in the last load
+		self.failed = {}
+
+
+	def get_markets(self, base = None):
+		"""
+		Get the names of every active market.
+
+		:param base: <str> Only keep markets with this base currency (ex: BTC)
+		:return: <list> Market names
+		"""
+
+		markets = self.Bittrex.get_markets()['result']
+
+		return [market['MarketName'] for market in markets
+				if market['IsActive'] and (base is None or market['BaseCurrency'] == base)]
+
+
+	async def download(self, markets):
+		"""
+		Download the candles of every market concurrently.
+
+		:param markets: <list> Market names
+		:return: <list> GetTicks response of each market
+		"""
+
+		async with AsyncBittrex(self.secrets, concurrency = self.concurrency, rate = self.rate, api_url = self.api_url) as client:
+			return await client.get_many('GetTicks', [{'marketName': market, 'tickInterval': self.timeInterval}
+														for market in markets])
+
+
+	def load(self, markets = None):
+		"""
+		Get the candles of many markets, only downloading the ones not already cached.
+		Failed downloads are printed, kept in failed and left out of the cache so
+		the next load tries them again.
+
+		:param markets: <list> Market names (defaults to every active market)
+		:return: <dict> Market name to candle columns, T as seconds since epoch (no candles where the download failed)
+		"""
+
+		markets = self.get_markets() if markets is None else markets
+		candles = {market: self.cache.get(market) for market in markets}
+		missing = [market for market, candle in candles.items() if candle is None]
+
+		self.failed = {}
+
+		if missing:
+			responses = asyncio.run(self.download(missing))
+
+			for market, response in zip(missing, responses):
+				candles[market] = parse_ticks(response['result'] or [])
+
+				if response.get('success') and response.get('result') is not None:
+					self.cache.put(market, candles[market])
+				else:
+					self.failed[market] = response.get('message')
+					print('{} candles failed to download: {}'.format(market, response.get('message')))
+
+		return candles
+
+
+	def panel(self, markets = None, columns = ['C']):
+		"""
+		Line the candles of many markets up on one time index.
+		Times a market has no candle for are NaN.
+
+		:param markets: <list> Market names (defaults to every active market)
+		:param columns: <list> Bittrex columns to include, any of O, H, L, C, V, BV
+		:return: <ndarray> Array shaped (columns, times, markets),
+				 <DatetimeIndex> Shared times,
+				 <list> Market names
+		"""
+
+		candles = self.load(markets)
+		markets = list(candles)
+
+		times = np.unique(np.concatenate([candle['T'] for candle in candles.values()] or [np.empty(0, dtype = np.int64)]))
+		panel = np.full((len(columns), len(times), len(markets)), np.nan)
+
+		for j, candle in enumerate(candles.values()):
+			rows = np.searchsorted(times, candle['T'])
+			for i, column in enumerate(columns):
+				panel[i, rows, j] = candle[column]
+
+		return panel, pd.DatetimeIndex(times.astype('datetime64[s]'), name = NAMES['T']), markets
+
+
+	def wide(self, markets = None, column = 'C'):
+		"""
+		One price of many markets side by side.
+
+		:param markets: <list> Market names (defaults to every active market)
+		:param column: <str> Bittrex column to use, one of O, H, L, C, V, BV
+		:return: <DataFrame> One column per market indexed by time
+		"""
+
+		panel, index, markets = self.panel(markets, [column])
+
+		return pd.DataFrame(panel[0], index = index, columns = markets)
+
+
+
+
+if __name__ == '__main__':
+
+	with open('./database/secrets.json') as file:
+		secrets = json.load(file)
+		file.close()
+
+	loader = BulkLoader(secrets, 'hour')
+
+	print(loader.wide(loader.get_markets('BTC')))
@@ -0,0 +1,99 @@
+from Resampler import Bars, resample, timeframe_seconds
+from TradeTape import new_trades
+import time
+
+
+
+
+class CandleBuilder():
+	"""
+	Builds candles of any length, down to a second, straight from the
+	getmarkethistory trade tape as it comes in, so strategies can act on bars
+	before Bittrex closes its own candles. Pages overlap, so only trades past
+	the newest one already seen are used (see TradeTape.new_trades). The
+	current bar is kept open and updated with every page. Bars are only made
+	for periods that had trades.
+	"""
+
+	def __init__(self, market, timeframe = 60, lastId = None):
+		"""
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param timeframe: <int> Seconds in each bar or <str> a timeframe (ex: 10s, 1m, see Resampler.timeframe_seconds)
+		:param lastId: <int> Id of the newest trade already seen, older trades are skipped
+		"""
+
+		self.market = market
+		self.seconds = timeframe_seconds(timeframe)
+		self.lastId = lastId
+		self.series = Bars()
+
+
+	def update(self, trades):
+		"""
+		Add a page of the trade tape.
+
+		:param trades: <list> Trade dicts from getmarkethistory
+		:return: <int> Number of new trades added
+		"""
+
+		trades = new_trades(trades, self.lastId)
+		count = len(trades['Id'])
+
+		if count == 0:
+			return 0
+
+		self.lastId = int(trades['Id'][-1])
+
+		# Every trade is a candle of its own to aggregate into bars
+		prices = trades['Price']
+		quantities = trades['Quantity']
+		self.series.add(resample({'T': trades['T'] // 1000, 'O': prices, 'H': prices, 'L': prices, 'C': prices,
+								'V': quantities, 'BV': prices * quantities}, self.seconds))
+
+		return count
+
+
+	def poll(self, bittrex):
+		"""
+		Fetch the latest page of the trade tape and add it.
+
+		:param bittrex: <Bittrex> Client to fetch with
+		:return: <int> Number of new trades added
+		"""
+
+		return self.update(bittrex.get_market_history(self.market)['result'])
+
+
+	def closed(self, now = None):
+		"""
+		:param now: <float> Seconds since epoch (defaults to now)
+		:return: <bool> Whether the last bar's period is over
+		"""
+
+		start = self.series.last_start()
+
+		return start is None or (time.time() if now is None else now) >= start + self.seconds
+
+
+	def bars(self, partial = True, now = None):
+		"""
+		:param partial: <bool> Include the current bar while it is still open
+		:param now: <float> Seconds since epoch to decide if the current bar is open (defaults to now)
+		:return: <dict> Column name to array of bars (views, copy before changing), T as the time each bar starts
+		"""
+
+		return self.series.view(partial or self.closed(now))
+
+
+	def frame(self, partial = True, columns = None):
+		"""
+		:param partial: <bool> Include the current bar while it is still open
+		:param columns: <list> Columns to include besides T (defaults to all)
+		:return: <DataFrame> Bars indexed by Time like DataGrabber.get_data
+		"""
+
+		from DataGrabber import frame_candles
+
+		bars = self.bars(partial)
+
+		return frame_candles({column: bars[column] for column in ['T'] + (columns or ['O', 'H', 'L', 'C', 'V', 'BV'])})
@@ -0,0 +1,220 @@
+import numpy as np
+import json
+import os
+import time
+
+# Seconds in each Bittrex tickInterval
+INTERVALS = {'oneMin': 60, 'fiveMin': 300, 'thirtyMin': 1800, 'hour': 3600, 'day': 86400}
+
+# Column files kept for every candle. T is stored as seconds since epoch
+COLUMNS = {'T': np.int64, 'O': np.float64, 'H': np.float64, 'L': np.float64,
+			'C': np.float64, 'V': np.float64, 'BV': np.float64}
+
+
+
+
+def parse_ticks(ticks, columns = None):
+	"""
+	Turn the candles Bittrex returns into one array per column.
+	Only the requested columns are pulled out of the candle dicts.
+
+	:param ticks: <list> Candle dicts from GetTicks or GetLatestTick
+	:param columns: <list> Columns to parse besides T (defaults to all)
+	:return: <dict> Column name to array, T as seconds since epoch
+	"""
+
+	if isinstance(ticks, dict):
+		ticks = [ticks]
+
+	# Bittrex gives time values as '2018-08-27T23:51:00', parse the whole column at once
+	candles = {'T': np.array([tick['T'] for tick in ticks], dtype = 'datetime64[s]').astype(np.int64)}
+
+	for column in (columns or COLUMNS):
+		if column != 'T':
+			candles[column] = np.fromiter((tick[column] for tick in ticks), dtype = COLUMNS[column], count = len(ticks))
+
+	return candles
+
+
+
+
+def folder_rows(folder):
+	"""
+	Number of rows stored in a folder of column files. The meta file is written
+	after the columns, so anything past this count is from an append that did not finish.
+
+	:param folder: <str> Folder of column files
+	:return: <int> Number of complete rows
+	"""
+
+	try:
+		with open(os.path.join(folder, 'meta.json')) as file:
+			return json.load(file)['rows']
+	except FileNotFoundError:
+		return 0
+
+
+def read_columns(folder, dtypes, columns = None):
+	"""
+	Load column files without copying them into memory.
+
+	:param folder: <str> Folder of column files
+	:param dtypes: <dict> Column name to dtype, a (dtype, (n,)) subarray for n values per row
+	:param columns: <list> Columns to load (defaults to all)
+	:return: <dict> Column name to memory mapped array
+	"""
+
+	rows = folder_rows(folder)
+
+	if rows == 0:
+		return {column: np.empty(0, dtype = dtypes[column]) for column in (columns or dtypes)}
+
+	return {column: np.memmap(os.path.join(folder, column + '.bin'), dtype = dtypes[column], mode = 'r', shape = (rows,))
+			for column in (columns or dtypes)}
+
+
+def append_columns(folder, dtypes, data):
+	"""
+	Append rows to every column file of a folder.
+
+	:param folder: <str> Folder of column files
+	:param dtypes: <dict> Column name to dtype, a (dtype, (n,)) subarray for n values per row
+	:param data: <dict> Column name to array of the new rows
+	:return: <int> Number of rows added
+	"""
+
+	rows = folder_rows(folder)
+	added = len(data[next(iter(dtypes))])
+
+	if added == 0:
+		return 0
+
+	os.makedirs(folder, exist_ok = True)
+
+	for column, dtype in dtypes.items():
+		dtype = np.dtype(dtype)
+		with open(os.path.join(folder, column + '.bin'), 'ab') as file:
+			# Drop anything left over from an append that did not finish
+			file.truncate(rows * dtype.itemsize)
+			file.write(np.ascontiguousarray(data[column], dtype = dtype.base).tobytes())
+
+	# Only count the new rows once every column has them
+	meta = os.path.join(folder, 'meta.json')
+	with open(meta + '.tmp', 'w') as file:
+		json.dump({'rows': rows + added}, file)
+	os.replace(meta + '.tmp', meta)
+
+	return added
+
+
+
+
+class CandleStore():
+	"""
+	On disk store of historical candles, one folder per market and tickInterval
+	with a flat binary file per column. Columns are only ever appended to and
+	are read back memory mapped, so loading history does not touch the network
+	and it keeps growing past the window the api returns.
+	"""
+
+	def __init__(self, bittrex, path = './database/candles'):
+		self.Bittrex = bittrex
+		self.path = path
+
+
+	def folder(self, market, tickInterval):
+		"""
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param tickInterval: <str> String literal time delta (ex: oneMin, fiveMin)
+		:return: <str> Folder holding the candles of the market
+		"""
+
+		return os.path.join(self.path, market, tickInterval)
+
+
+	def rows(self, market, tickInterval):
+		"""
+		:return: <int> Number of complete candles stored
+		"""
+
+		return folder_rows(self.folder(market, tickInterval))
+
+
+	def read(self, market, tickInterval, columns = None):
+		"""
+		Load stored candles without copying them into memory.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param tickInterval: <str> String literal time delta (ex: oneMin, fiveMin)
+		:param columns: <list> Columns to load besides T (defaults to all)
+		:return: <dict> Column name to memory mapped array, T as seconds since epoch
+		"""
+
+		columns = ['T'] + [column for column in (columns or COLUMNS) if column != 'T']
+
+		return read_columns(self.folder(market, tickInterval), COLUMNS, columns)
+
+
+	def last_time(self, market, tickInterval):
+		"""
+		:return: <int> Time of the newest stored candle in seconds since epoch, None if empty
+		"""
+
+		rows = self.rows(market, tickInterval)
+
+		if rows == 0:
+			return None
+
+		return int(self.read(market, tickInterval, ['T'])['T'][-1])
+
+
+	def append(self, market, tickInterval, candles):
+		"""
+		Add candles newer than the last one stored. Candles still open are left out
+		so they get stored once they close.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param tickInterval: <str> String literal time delta (ex: oneMin, fiveMin)
+		:param candles: <dict> Column name to array, as returned by parse_ticks
+		:return: <int> Number of candles added
+		"""
+
+		last = self.last_time(market, tickInterval)
+
+		times = candles['T']
+		keep = times + INTERVALS[tickInterval] <= time.time()
+		if last is not None:
+			keep &= times > last
+
+		if not keep.any():
+			return 0
+
+		return append_columns(self.folder(market, tickInterval), COLUMNS, {column: candles[column][keep] for column in COLUMNS})
+
+
+	def refresh(self, market, tickInterval):
+		"""
+		Bring the stored candles up to date. When only the latest candle is
+		missing just that one is requested, otherwise the full GetTicks window
+		is downloaded and only the new candles are kept.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param tickInterval: <str> String literal time delta (ex: oneMin, fiveMin)
+		:return: <int> Number of candles added
+		"""
+
+		last = self.last_time(market, tickInterval)
+		interval = INTERVALS[tickInterval]
+
+		if last is not None and time.time() - last < 3 * interval:
+			latest = self.Bittrex.get_latest_tick(market, tickInterval)['result'] or []
+			candles = parse_ticks(latest)
+
+			# Fall back to the full history if there is a gap before the latest candle
+			if len(candles['T']) and candles['T'].min() <= last + interval:
+				return self.append(market, tickInterval, candles)
+
+		ticks = self.Bittrex.get_ticks(market, tickInterval)['result'] or []
+
+		return self.append(market, tickInterval, parse_ticks(ticks))
+
@@ -1,11 +1,53 @@
 from Bittrex import Bittrex
+from CandleStore import CandleStore, parse_ticks
+import numpy as np
 import pandas as pd
-import json
-from datetime import datetime
-import matplotlib.pyplot as plt
-import csv
 
+# Create naming dictionary
+NAMES = {'O':'Open', 'H':'High', 'L':'Low', 'C':'Close', 'V':'Volume', 'T':'Time', 'BV':'BookValue'}
 
+# Prices need every bit of a float64 for satoshi values, volumes are fine as float32
+DTYPES = {'O': np.float64, 'H': np.float64, 'L': np.float64, 'C': np.float64, 'V': np.float32, 'BV': np.float32}
+
+
+
+
+def frame_candles(candles):
+	"""
+	Turn candle columns into a DataFrame indexed by time.
+
+	:param candles: <dict> Column name to array, T as seconds since epoch
+	:return: <DataFrame> Named columns with compact dtypes indexed by Time
+	"""
+
+	index = pd.DatetimeIndex(candles['T'].astype('datetime64[s]'), name = NAMES['T'])
+
+	return pd.DataFrame({NAMES[column]: np.asarray(values, dtype = DTYPES[column])
+						for column, values in candles.items() if column != 'T'}, index = index)
+
+
+def fetch_candles(bittrex, market, timeInterval, columns, store = None):
+	"""
+	Grab the historical candles of a market, from the local store when given one.
+	Only the requested columns are ever built.
+
+	:param bittrex: <Bittrex> Client to download with
+	:param market: <str> String literal for the market (ex: BTC-LTC)
+	:param timeInterval: <str> String literal time delta (ex: oneMin, fiveMin, thirtyMin, day)
+	:param columns: <list> Bittrex columns to load, any of O, H, L, C, V, BV
+	:param store: <CandleStore> Local store to refresh and load from
+	:return: <DataFrame> Requested columns indexed by time
+	"""
+
+	# Load from the local store, only fetching candles newer than the ones on disk
+	if store is not None:
+		store.refresh(market, timeInterval)
+		return frame_candles(store.read(market, timeInterval, columns))
+
+	# Get Bittrex historical data
+	data = bittrex.get_ticks(market, timeInterval)['result'] or []
+
+	return frame_candles(parse_ticks(data, columns))
 
 
 
@@ -16,50 +58,29 @@ class DataGrabber():
 	it will be used in a graphing, testing and live trading applications
 	"""
 
-	def __init__(self, secrets, market, timeInterval, priceType):
+	def __init__(self, secrets, market, timeInterval, priceType, storePath = None):
 		self.Bittrex = Bittrex(secrets)
 		self.market = market
 		self.timeInterval = timeInterval
 		self.priceType = priceType
-		self.data = pd.DataFrame()
-
-
-	def clean_historical_data(self, brokenDate):
-		"""
-		The Bittrex historical data gives time values as '2018-08-27T23:51:00'.
-		This function will clean this into a datetime variable.
-
-		:param brokenDate: <str> The messy date from Bittrex
-		:return: <datetime> New clean datetime value
-		"""
 
-		return datetime.strptime(brokenDate, '%Y-%m-%dT%H:%M:%S')
+		# Keep candles on disk and only download the new ones when given a place to store them
+		self.store = None if storePath is None else CandleStore(self.Bittrex, storePath)
 
+		self.data = pd.DataFrame()
 
 
-	def get_data(self):
+	def get_data(self, columns = None):
 		"""
 		Grab the historical data from Bittrex for the given market
 		and return as a Pandas DataFrame.
 		(Because who doesn't like Pandas??)
-		
-		:return: <DataFrame> Two column dataframe of time and price.
-		"""
-
-		# Create naming dictionary
-		nameDic = {'O':'Open', 'H':'High', 'L':'Low', 'C':'Close', 'V':'Volume', 'T':'Time', 'BV':'BookValue'}
 
-		# Get Bittrex historical data
-		data = self.Bittrex.get_ticks(self.market, self.timeInterval)['result']
-
-		# Create dataframe only take the time and chosen variable
-		df = pd.DataFrame(data)[['T', self.priceType]]
-
-		# Map column names to appropraite column values
-		df.columns = list(map(nameDic.get, list(df)))
+		:param columns: <list> Bittrex columns to load, any of O, H, L, C, V, BV (defaults to priceType)
+		:return: <DataFrame> Requested columns indexed by time
+		"""
 
-		# Fix the time variable that Bittrex gives
-		df['Time'] = df['Time'].apply(self.clean_historical_data)
+		df = fetch_candles(self.Bittrex, self.market, self.timeInterval, columns or [self.priceType], self.store)
 
 		self.data = df
 
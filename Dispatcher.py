@@ -0,0 +1,249 @@
+from Bittrex import Bittrex, load_secrets
+from EventLog import NULL_LOG
+from Instrumentation import INSTRUMENTS
+from Ledger import Ledger
+from MarketInfo import MarketInfo
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+
+
+def order_call(market, side, quantity, rate):
+	"""
+	:param market: <str> String literal for the market (ex: BTC-LTC)
+	:param side: <str> buy or sell
+	:param quantity: <float> Amount to trade
+	:param rate: <float> Limit rate
+	:return: <tuple> (method, options) of the request placing the order
+	"""
+
+	return side + 'limit', {'market': market, 'quantity': quantity, 'rate': rate}
+
+
+def sync_client(bittrex):
+	"""
+	:param bittrex: <Bittrex> or <AsyncBittrex> Client
+	:return: <Bittrex> The client itself, or a blocking one with the same key and url for an AsyncBittrex
+	"""
+
+	if not asyncio.iscoroutinefunction(bittrex.api_request):
+		return bittrex
+
+	return Bittrex({'bittrex': {'api_key': bittrex.api_key, 'api_secret': bittrex.api_secret}}, api_url = bittrex.api_url)
+
+
+def cancel_calls(openOrders, markets = None):
+	"""
+	:param openOrders: <list> Result of getopenorders
+	:param markets: <list> String literals for the markets to cancel in (defaults to all)
+	:return: <list> (method, options) of the request cancelling each order
+	"""
+
+	return [('cancel', {'uuid': order['OrderUuid']}) for order in openOrders
+			if markets is None or order['Exchange'] in markets]
+
+
+
+
+class Dispatcher():
+	"""
+	Sends many signed requests at once, at most concurrency in flight. Every
+	client of an api key shares one strictly increasing nonce (see
+	Bittrex.Nonce), so orders can be placed and cancelled in parallel without
+	two requests signed in the same millisecond colliding.
+
+	With a Bittrex the requests go out from a pool of threads sharing its
+	session, with an AsyncBittrex the *_async methods gather them on the event
+	loop under its own concurrency and rate limits.
+
+	Orders take the same path as one placed by a Trader: checked and rounded
+	against MarketInfo (rejected ones never leave here), logged, and held in
+	the Ledger as soon as Bittrex accepts them.
+	"""
+
+	def __init__(self, bittrex, concurrency = 8, info = None, ledger = None, events = None):
+		"""
+		:param bittrex: <Bittrex> or <AsyncBittrex> Client to send requests through
+		:param concurrency: <int> Most requests in flight at once from the thread pool,
+							keep it within the client's poolSize so connections are reused
+		:param info: <MarketInfo> Market metadata to check orders against (defaults to a new one)
+		:param ledger: <Ledger> Ledger to hold the funds of accepted orders in (defaults to a new one)
+		:param events: <EventLog> Log to record orders to
+		"""
+
+		self.Bittrex = bittrex
+		self.concurrency = concurrency
+		self.pool = None
+		self.events = NULL_LOG if events is None else events
+
+		# Metadata and balances are looked up without blocking on an event loop's client
+		client = sync_client(bittrex) if info is None or ledger is None else None
+		self.info = MarketInfo(client) if info is None else info
+		self.ledger = Ledger(client, events = self.events) if ledger is None else ledger
+
+
+	def close(self):
+		"""
+		Stop the thread pool once requests in flight are done
+		"""
+
+		if self.pool is not None:
+			self.pool.shutdown()
+			self.pool = None
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *args):
+		self.close()
+
+
+	def dispatch(self, calls):
+		"""
+		Send many requests at once and wait for all of them.
+
+		:param calls: <list> (method, options) of each request (ex: ('cancel', {'uuid': uuid}))
+		:return: <list> JSON responses in the same order as calls
+		"""
+
+		if len(calls) <= 1:
+			return [self.Bittrex.api_request(method, options) for method, options in calls]
+
+		# Started on first use so a Dispatcher costs nothing until it sends something
+		if self.pool is None:
+			self.pool = ThreadPoolExecutor(self.concurrency)
+
+		return list(self.pool.map(lambda call: self.Bittrex.api_request(*call), calls))
+
+
+	async def dispatch_async(self, calls):
+		"""
+		:param calls: <list> (method, options) of each request
+		:return: <list> JSON responses in the same order as calls
+		"""
+
+		return await asyncio.gather(*[self.Bittrex.api_request(method, options) for method, options in calls])
+
+
+	def check(self, market, side, quantity, rate):
+		"""
+		Round an order and log it when MarketInfo rejects it.
+
+		:return: <float> Rounded quantity, <float> Rounded rate, <dict> Bittrex shaped error (None when the order is fine)
+		"""
+
+		quantity, rate, error = self.info.validate(market, quantity, rate)
+		if error is not None:
+			self.events.order(market, side, quantity, rate, error)
+
+		return quantity, rate, error
+
+
+	def record(self, market, side, quantity, rate, response):
+		"""
+		Log an order sent to Bittrex and hold its funds when it was accepted
+		"""
+
+		self.events.order(market, side, quantity, rate, response)
+		self.ledger.acknowledge(market, side, quantity, rate, response)
+
+
+	def place_order(self, market, side, quantity, rate):
+		"""
+		Check, place, log and record one limit order.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param side: <str> buy or sell
+		:param quantity: <float> Amount to trade
+		:param rate: <float> Limit rate
+		:return: <dict> Bittrex response, or the error it would have sent
+		"""
+
+		# Orders Bittrex would reject never leave here
+		quantity, rate, error = self.check(market, side, quantity, rate)
+		if error is not None:
+			return error
+
+		with INSTRUMENTS.span('trader.order'):
+			response = self.Bittrex.api_request(*order_call(market, side, quantity, rate))
+
+		self.record(market, side, quantity, rate, response)
+
+		return response
+
+
+	def place_orders(self, orders):
+		"""
+		Place many limit orders at once, in any markets
+
+		:param orders: <list> (market, side, quantity, rate) of each order, side being buy or sell
+		:return: <list> Bittrex responses (or the errors they would have sent) in the same order as orders
+		"""
+
+		if len(orders) <= 1:
+			return [self.place_order(*order) for order in orders]
+
+		if self.pool is None:
+			self.pool = ThreadPoolExecutor(self.concurrency)
+
+		return list(self.pool.map(lambda order: self.place_order(*order), orders))
+
+
+	async def place_orders_async(self, orders):
+		"""
+		:param orders: <list> (market, side, quantity, rate) of each order, side being buy or sell
+		:return: <list> Bittrex responses (or the errors they would have sent) in the same order as orders
+		"""
+
+		checked = [(market, side) + self.check(market, side, quantity, rate) for market, side, quantity, rate in orders]
+		sending = [order[:4] for order in checked if order[4] is None]
+
+		responses = iter(await self.dispatch_async([order_call(*order) for order in sending]))
+
+		results = []
+		for market, side, quantity, rate, error in checked:
+			if error is not None:
+				results.append(error)
+			else:
+				response = next(responses)
+				self.record(market, side, quantity, rate, response)
+				results.append(response)
+
+		return results
+
+
+	def cancel_all(self, markets = None):
+		"""
+		Cancel every open order with one getopenorders call and the cancels sent at once
+
+		:param markets: <list> String literals for the markets to cancel in (defaults to all)
+		:return: <dict> Uuid of each order to the Bittrex response to cancelling it
+		"""
+
+		calls = cancel_calls(self.Bittrex.get_open_orders('')['result'] or [], markets)
+
+		return {options['uuid']: response for (method, options), response in zip(calls, self.dispatch(calls))}
+
+
+	async def cancel_all_async(self, markets = None):
+		"""
+		:param markets: <list> String literals for the markets to cancel in (defaults to all)
+		:return: <dict> Uuid of each order to the Bittrex response to cancelling it
+		"""
+
+		calls = cancel_calls((await self.Bittrex.get_open_orders(''))['result'] or [], markets)
+		responses = await self.dispatch_async(calls)
+
+		return {options['uuid']: response for (method, options), response in zip(calls, responses)}
+
+
+
+
+if __name__ == '__main__':
+
+	with Dispatcher(Bittrex(load_secrets())) as dispatcher:
+		for uuid, response in dispatcher.cancel_all().items():
+			print(uuid, response['success'], response['message'])
@@ -0,0 +1,216 @@
+from collections import deque
+import pandas as pd
+import threading
+import datetime
+import json
+import time
+import os
+
+DECISION = 'decision'
+ORDER = 'order'
+FILL = 'fill'
+BALANCE = 'balance'
+
+
+
+
+def json_value(value):
+	"""
+	json.dumps default for values it can't write by itself.
+
+	:param value: Value to write (ex: a NumPy number or array)
+	:return: Plain Python value, or its repr for anything else
+	"""
+
+	if hasattr(value, 'tolist'):
+		return value.tolist()
+
+	return repr(value)
+
+
+
+
+class EventLog():
+	"""
+	Append-only JSON lines log of a trading session's decisions, orders,
+	fills and balances. log() only puts the event on a queue; a background
+	thread turns batches of them into lines and writes them out, so the
+	trading loop never waits on the disk.
+	"""
+
+	def __init__(self, name = 'TrailingAverage', folder = './log', flushEvery = 1.):
+		"""
+		:param name: <str> Name of the session, added to the file name
+		:param folder: <str> Folder to write the log to
+		:param flushEvery: <float> Most seconds an event waits before being written
+		"""
+
+		os.makedirs(folder, exist_ok = True)
+		self.path = os.path.join(folder, datetime.datetime.now().strftime('%d%b%Y%H%M') + name + '.jsonl')
+		self.flushEvery = flushEvery
+		self.queue = deque()
+		self.wake = threading.Event()
+		self.running = True
+		self.file = open(self.path, 'a')
+		self.writer = threading.Thread(target = self.write_loop, daemon = True)
+		self.writer.start()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def log(self, kind, **fields):
+		"""
+		Record an event. Cheap enough for the hot path, nothing is formatted here.
+
+		:param kind: <str> DECISION, ORDER, FILL, BALANCE or any other kind
+		:param fields: Values to record with it
+		"""
+
+		fields['time'] = time.time()
+		fields['kind'] = kind
+		self.queue.append(fields)
+
+	def decision(self, market, action, **fields):
+		"""
+		:param market: <str> Market the decision was for
+		:param action: <str> BUY, SELL or NONE
+		"""
+
+		self.log(DECISION, market = market, action = action, **fields)
+
+	def order(self, market, side, quantity, rate, response):
+		"""
+		:param market: <str> Market the order was placed in
+		:param side: <str> BUY or SELL
+		:param quantity: <float> Amount ordered
+		:param rate: <float> Limit rate
+		:param response: <dict> Bittrex response to placing it
+		"""
+
+		result = response.get('result') or {}
+		self.log(ORDER, market = market, side = side, quantity = quantity, rate = rate,
+				success = response.get('success'), message = response.get('message'), uuid = result.get('uuid'))
+
+	def fill(self, market, side, quantity, price, uuid = None):
+		"""
+		:param market: <str> Market the order filled in
+		:param side: <str> BUY or SELL
+		:param quantity: <float> Amount filled
+		:param price: <float> Price per unit
+		:param uuid: <str> Order that filled
+		"""
+
+		self.log(FILL, market = market, side = side, quantity = quantity, price = price, uuid = uuid)
+
+	def balances(self, balances):
+		"""
+		:param balances: <dict> Currency to available balance
+		"""
+
+		for currency, available in balances.items():
+			self.log(BALANCE, currency = currency, available = available)
+
+	def write(self):
+		"""
+		Write out everything queued so far as one batch
+		"""
+
+		lines = []
+		while self.queue:
+			event = self.queue.popleft()
+
+			try:
+				lines.append(json.dumps(event, default = json_value))
+			except (TypeError, ValueError) as error:
+				# Keep what can be kept of it instead of losing the batch
+				lines.append(json.dumps({'time': event.get('time'), 'kind': event.get('kind'), 'error': repr(error)}))
+
+		if lines:
+			self.file.write('\n'.join(lines) + '\n')
+			self.file.flush()
+
+	def write_loop(self):
+		"""
+		Background thread writing a batch every flushEvery seconds
+		"""
+
+		while self.running:
+			self.wake.wait(self.flushEvery)
+			self.wake.clear()
+
+			# One bad write must not stop every later event being written
+			try:
+				self.write()
+			except Exception as error:
+				print('event log write failed: {!r}'.format(error))
+
+	def close(self):
+		"""
+		Write anything left and close the file
+		"""
+
+		self.running = False
+		self.wake.set()
+		self.writer.join()
+		self.write()
+		self.file.close()
+
+
+
+
+class NullEventLog():
+	"""
+	Stands in for EventLog when nothing should be recorded.
+	"""
+
+	path = None
+
+	def log(self, kind, **fields):
+		pass
+
+	def decision(self, market, action, **fields):
+		pass
+
+	def order(self, market, side, quantity, rate, response):
+		pass
+
+	def fill(self, market, side, quantity, price, uuid = None):
+		pass
+
+	def balances(self, balances):
+		pass
+
+	def close(self):
+		pass
+
+
+NULL_LOG = NullEventLog()
+
+
+
+
+def read_events(path):
+	"""
+	Load a whole session back for analysis.
+
+	:param path: <str> Log file written by EventLog
+	:return: <dict> Kind to DataFrame of its events in order, time as datetime64
+	"""
+
+	events = {}
+	with open(path) as file:
+		for line in file:
+			if line.strip():
+				event = json.loads(line)
+				events.setdefault(event.pop('kind'), []).append(event)
+
+	frames = {}
+	for kind, rows in events.items():
+		frame = pd.DataFrame(rows)
+		frame['time'] = pd.to_datetime(frame['time'], unit = 's')
+		frames[kind] = frame
+
+	return frames
@@ -0,0 +1,146 @@
+from OrderBook import BUY, SELL
+import numpy as np
+
+
+
+
+def plan_orders(book, side, quantity = None, limit = None):
+	"""
+	Work out every child order up front from one book snapshot. Each level at
+	the limit or better gets whatever is left of the quantity, up to what that
+	level holds.
+
+	:param book: <OrderBook> Snapshot of the market's order book
+	:param side: <str> buy or sell, the side we are trading on
+	:param quantity: <float> Amount to trade (defaults to everything up to the limit)
+	:param limit: <float> Worst rate to trade at (defaults to as deep as needed)
+	:return: <ndarray>, <ndarray> Rate and quantity of each child order, best first
+	"""
+
+	# Selling fills against the bids, buying against the asks
+	against = BUY if side == SELL else SELL
+
+	if limit is None:
+		rates, available = book.prices[against], book.quantities[against]
+	else:
+		rates, available = book.levels(against, limit)
+
+	if quantity is None:
+		return rates.copy(), available.copy()
+
+	# Amount still wanted when reaching each level
+	before = np.concatenate(([0.], np.cumsum(available)[:-1]))
+	quantities = np.minimum(available, np.maximum(quantity - before, 0.))
+
+	keep = quantities > 0
+
+	return rates[keep], quantities[keep]
+
+
+
+
+class ExecutionPlanner():
+	"""
+	Places a large order as child orders worked out in one pass over one
+	book snapshot, submits them all at once and then checks how they filled
+	with one getopenorders call plus getorder for the ones that closed.
+	Orders go through the Trader's Dispatcher so they are checked, logged,
+	timed and held in the ledger the same as any other.
+	"""
+
+	def __init__(self, trader):
+		"""
+		:param trader: <Trader> Trader of the market to place orders in
+		"""
+
+		self.trader = trader
+
+
+	def submit(self, side, rates, quantities):
+		"""
+		Place every child order concurrently.
+
+		:param side: <str> buy or sell
+		:param rates: <ndarray> Rate of each order
+		:param quantities: <ndarray> Quantity of each order
+		:return: <list> Bittrex response to each order, in the same order
+		"""
+
+		market = self.trader.market
+		responses = self.trader.dispatcher.place_orders([(market, side, quantity, rate)
+														for quantity, rate in zip(quantities.tolist(), rates.tolist())])
+
+		# Prices have changed
+		self.trader.invalidate()
+
+		return responses
+
+
+	def reconcile(self, uuids):
+		"""
+		Check how the given orders have filled.
+
+		:param uuids: <list> Orders to check
+		:return: <dict> filled: <float> Total quantity filled, price: <float> Average fill price
+				 (NaN when nothing filled), open: <list> uuids still open, orders: <dict> uuid to order
+		"""
+
+		bittrex = self.trader.Bittrex
+		wanted = set(uuids)
+
+		# One call covers every order still open, only closed ones need looking up
+		orders = {order['OrderUuid']: order for order in bittrex.get_open_orders(self.trader.market)['result'] or []
+				if order['OrderUuid'] in wanted}
+		stillOpen = set(orders)
+		closed = [uuid for uuid in uuids if uuid not in stillOpen]
+
+		for response in self.trader.dispatcher.dispatch([('getorder', {'uuid': uuid}) for uuid in closed]):
+			if response['success']:
+				orders[response['result']['OrderUuid']] = response['result']
+
+		# Save the ledger looking these up again
+		for uuid, order in orders.items():
+			self.trader.ledger.apply(order, uuid in stillOpen)
+
+		filled = 0.
+		cost = 0.
+		for uuid in uuids:
+			order = orders.get(uuid)
+			if order is None:
+				continue
+
+			quantity = order['Quantity'] - order['QuantityRemaining']
+			if quantity > 0 and order['PricePerUnit'] is not None:
+				filled += quantity
+				cost += quantity * order['PricePerUnit']
+				if uuid not in stillOpen:
+					side = SELL if order['Type'] == 'LIMIT_SELL' else BUY
+					self.trader.events.fill(self.trader.market, side, quantity, order['PricePerUnit'], uuid)
+
+		return {'filled': filled, 'price': cost / filled if filled else np.nan,
+				'open': [uuid for uuid in uuids if uuid in stillOpen], 'orders': orders}
+
+
+	def execute(self, side, quantity = None, limit = None, book = None):
+		"""
+		Plan, submit and reconcile one order.
+
+		:param side: <str> buy or sell
+		:param quantity: <float> Amount to trade (defaults to everything up to the limit)
+		:param limit: <float> Worst rate to trade at (defaults to as deep as needed)
+		:param book: <OrderBook> Snapshot to plan from (defaults to fetching one)
+		:return: <dict> rates and quantities planned, responses to placing them,
+				 and the filled, price and open results of reconcile
+		"""
+
+		if book is None:
+			book = self.trader.get_order_book()
+
+		rates, quantities = plan_orders(book, side, quantity, limit)
+		responses = self.submit(side, rates, quantities)
+
+		uuids = [response['result']['uuid'] for response in responses if response['success']]
+		result = self.reconcile(uuids) if uuids else {'filled': 0., 'price': np.nan, 'open': [], 'orders': {}}
+		result.update({'rates': rates, 'quantities': quantities, 'responses': responses})
+
+		return result
@@ -1,9 +1,6 @@
-from Bittrex import Bittrex
-import pandas as pd
-import json
-from datetime import datetime
-import matplotlib.pyplot as plt
-import csv
+from Bittrex import Bittrex, load_secrets
+from CandleStore import CandleStore
+from DataGrabber import fetch_candles
 
 
 
@@ -16,24 +13,14 @@ class Grapher():
 	performance of trading algorithm
 	"""
 
-	def __init__(self, secrets, market, timeInterval, priceType):
+	def __init__(self, secrets, market, timeInterval, priceType, storePath = None):
 		self.Bittrex = Bittrex(secrets)
 		self.market = market
 		self.timeInterval = timeInterval
 		self.priceType = priceType
 
-
-	def clean_historical_data(self, brokenDate):
-		"""
-		The Bittrex historical data gives time values as '2018-08-27T23:51:00'.
-		This function will clean this into a datetime variable.
-
-		:param brokenDate: <str> The messy date from Bittrex
-		:return: <datetime> New clean datetime value
-		"""
-
-		return datetime.strptime(brokenDate, '%Y-%m-%dT%H:%M:%S')
-
+		# Keep candles on disk and only download the new ones when given a place to store them
+		self.store = None if storePath is None else CandleStore(self.Bittrex, storePath)
 
 
 	def get_data(self):
@@ -42,44 +29,30 @@ class Grapher():
 		and return as a Pandas DataFrame.
 		(Because who doesn't like Pandas??)
 		
-		:return: <DataFrame> Two column dataframe of time and price.
+		:return: <DataFrame> Price column indexed by time.
 		"""
 
-		# Create naming dictionary
-		nameDic = {'O':'Open', 'H':'High', 'L':'Low', 'C':'Close', 'V':'Volume', 'T':'Time', 'BV':'BookValue'}
-
-		# Get Bittrex historical data
-		data = self.Bittrex.get_ticks(self.market, self.timeInterval)['result']
-
-		# Create dataframe only take the time and chosen variable
-		df = pd.DataFrame(data)[['T', self.priceType]]
-
-		# Map column names to appropraite column values
-		df.columns = list(map(nameDic.get, list(df)))
-
-		# Fix the time variable that Bittrex gives
-		df['Time'] = df['Time'].apply(self.clean_historical_data)
-
-		return df
+		return fetch_candles(self.Bittrex, self.market, self.timeInterval, [self.priceType], self.store)
 
 	def graph_basic(self):
+		# Only pay for loading matplotlib when actually graphing
+		import matplotlib.pyplot as plt
+
 		df = self.get_data()
 
 		print(df)
 		print(type(df))
 
-		plt.plot(df.ix[:,0], df.ix[:,1])
+		plt.plot(df.index, df.iloc[:,0])
 		plt.gcf().autofmt_xdate()
 		plt.show()
 
 
 
 
-with open('./database/secrets.json') as file:
-	secrets = json.load(file)
-	file.close()
+if __name__ == '__main__':
 
-test = Grapher(secrets, 'BTC-LTC', 'day', 'O')
+	test = Grapher(load_secrets(), 'BTC-LTC', 'day', 'O', './database/candles')
 
-df = test.get_data()
+	test.graph_basic()
 
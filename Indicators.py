@@ -0,0 +1,423 @@
+"""
+Streaming indicators shared by backtesting and live trading.
+
+Each indicator comes as a function that computes a whole array at once (batch mode, for Tester)
+and a class whose update() takes one new value at a time in O(1) (tick mode, for Trader).
+Both modes do the exact same floating point operations in the same order,
+so they give identical values. Tick mode also takes NumPy arrays to update
+many markets in one step. Values are NaN until the window has filled.
+"""
+
+import numpy as np
+
+
+
+
+def missing(like):
+	"""
+	:param like: <float> or <ndarray> Value the result should be shaped like
+	:return: <float> or <ndarray> NaN in the same shape
+	"""
+
+	shape = np.shape(like)
+
+	return np.nan if shape == () else np.full(shape, np.nan)
+
+
+def accumulate(step, first, values):
+	"""
+	Run a recurrence over an array in one call, one Python float operation
+	per element just like tick mode does.
+
+	:param step: <function> Takes the previous result and the next value
+	:param first: <float> Starting result
+	:param values: <ndarray> Values to feed through the recurrence
+	:return: <ndarray> Result after each value, starting with first
+	"""
+
+	inputs = np.empty(len(values) + 1, dtype = object)
+	inputs[0] = float(first)
+	inputs[1:] = values.tolist()
+
+	return np.frompyfunc(step, 2, 1).accumulate(inputs, dtype = object).astype(np.float64)
+
+
+def rsi_value(gain, loss):
+	"""
+	:return: RSI from the average gain and loss (50 when the price has not moved)
+	"""
+
+	total = gain + loss
+
+	with np.errstate(invalid = 'ignore', divide = 'ignore'):
+		return np.where(total == 0, 50., 100 * gain / total)[()]
+
+
+
+
+def sma(values, window):
+	"""
+	Simple moving average of a whole array, from pandas rolling().mean().
+	SMA does the same compensated sums one value at a time, so a window of one
+	repeated price averages to exactly that price in both modes.
+
+	:param values: <ndarray> Prices
+	:param window: <int> Number of values to average
+	:return: <ndarray> Average ending at each value (NaN while the window holds a NaN)
+	"""
+
+	# Only needed here, keeps pandas out of the start up of everything importing Indicators
+	from pandas import Series
+
+	return Series(np.asarray(values, dtype = np.float64)).rolling(window).mean().to_numpy()
+
+
+def ema(values, window):
+	"""
+	Exponential moving average of a whole array, seeded with the first value.
+
+	:param values: <ndarray> Prices
+	:param window: <int> Span of the average, alpha = 2 / (window + 1)
+	:return: <ndarray> Average ending at each value
+	"""
+
+	values = np.asarray(values, dtype = np.float64)
+	alpha = 2 / (window + 1)
+
+	if len(values) == 0:
+		return np.empty(0)
+
+	result = accumulate(lambda average, value: average + alpha * (value - average), values[0], values[1:])
+	result[:window - 1] = np.nan
+
+	return result
+
+
+def rolling_std(values, window):
+	"""
+	Rolling sample standard deviation of a whole array. Values are shifted by the
+	first one before summing squares to keep precision on small prices.
+
+	:param values: <ndarray> Prices
+	:param window: <int> Number of values in each window
+	:return: <ndarray> Standard deviation of the window ending at each value
+	"""
+
+	values = np.asarray(values, dtype = np.float64)
+
+	if len(values) == 0:
+		return np.empty(0)
+
+	shifted = values - values[0]
+	sums = np.concatenate(([0.], np.cumsum(shifted)))
+	squares = np.concatenate(([0.], np.cumsum(shifted * shifted)))
+
+	total = sums[window:] - sums[:-window]
+	totalSquares = squares[window:] - squares[:-window]
+
+	result = np.full(len(values), np.nan)
+	result[window - 1:] = np.sqrt(np.maximum((totalSquares - total * total / window) / (window - 1), 0))
+
+	return result
+
+
+def bollinger(values, window, width = 2):
+	"""
+	Bollinger bands of a whole array.
+
+	:param values: <ndarray> Prices
+	:param window: <int> Number of values in each window
+	:param width: <float> Standard deviations between the middle and each band
+	:return: <ndarray>, <ndarray>, <ndarray> Middle, upper and lower bands
+	"""
+
+	middle = sma(values, window)
+	std = rolling_std(values, window)
+
+	return middle, middle + width * std, middle - width * std
+
+
+def rsi(values, window = 14):
+	"""
+	Wilder's relative strength index of a whole array.
+
+	:param values: <ndarray> Prices
+	:param window: <int> Number of changes to smooth over
+	:return: <ndarray> RSI (0 to 100) at each value
+	"""
+
+	values = np.asarray(values, dtype = np.float64)
+	result = np.full(len(values), np.nan)
+
+	if len(values) <= window:
+		return result
+
+	changes = values[1:] - values[:-1]
+	gains = np.maximum(changes, 0.)
+	losses = np.maximum(-changes, 0.)
+
+	# Start with the plain average of the first window of changes then smooth the rest
+	step = lambda average, value: average + (value - average) / window
+	averageGains = accumulate(step, np.cumsum(gains[:window])[-1] / window, gains[window:])
+	averageLosses = accumulate(step, np.cumsum(losses[:window])[-1] / window, losses[window:])
+
+	result[window:] = rsi_value(averageGains, averageLosses)
+
+	return result
+
+
+
+
+class SMA():
+	"""
+	Simple moving average, one value at a time.
+	Keeps the window sum with the same Kahan compensated add and remove as
+	pandas rolling().mean() (see sma), so rounding never builds up and the
+	values match sma to the bit. Like pandas, NaN values are left out of the
+	sum, the average is NaN while the window holds one, and a window of one
+	repeated price averages to exactly that price.
+	"""
+
+	def __init__(self, window):
+		self.window = window
+		self.values = [None] * window
+		self.count = 0
+		self.value = np.nan
+
+		# Window sum, rounding carried by adds and removes, values counted, negative values counted
+		self.total = 0.
+		self.addError = 0.
+		self.removeError = 0.
+		self.counted = 0
+		self.negatives = 0
+
+		# Last value added and how many times in a row it was added
+		self.previous = None
+		self.repeats = 0
+
+	@property
+	def ready(self):
+		"""
+		:return: <bool> Whether the window has filled
+		"""
+
+		return self.count >= self.window
+
+	def add(self, value):
+		"""
+		:param value: <ndarray> Value entering the window
+		"""
+
+		valid = value == value
+		y = value - self.addError
+		total = self.total + y
+
+		self.addError = np.where(valid, total - self.total - y, self.addError)
+		self.total = np.where(valid, total, self.total)
+		self.counted = self.counted + valid
+		self.negatives = self.negatives + (valid & np.signbit(value))
+		self.repeats = np.where(valid, np.where(value == self.previous, self.repeats + 1, 1), self.repeats)
+		self.previous = np.where(valid, value, self.previous)
+
+	def remove(self, value):
+		"""
+		:param value: <ndarray> Value leaving the window
+		"""
+
+		valid = value == value
+		y = -value - self.removeError
+		total = self.total + y
+
+		self.removeError = np.where(valid, total - self.total - y, self.removeError)
+		self.total = np.where(valid, total, self.total)
+		self.counted = self.counted - valid
+		self.negatives = self.negatives - (valid & np.signbit(value))
+
+	def update(self, value):
+		"""
+		:param value: <float> or <ndarray> Newest price
+		:return: <float> or <ndarray> Average ending at this price
+		"""
+
+		value = np.array(value, dtype = np.float64)
+
+		if self.previous is None:
+			self.previous = value
+
+		slot = self.count % self.window
+		if self.count >= self.window:
+			self.remove(self.values[slot])
+
+		self.values[slot] = value
+		self.add(value)
+		self.count += 1
+
+		with np.errstate(invalid = 'ignore', divide = 'ignore'):
+			average = self.total / self.counted
+
+		# Repeated prices give the price itself, the sign can't flip from rounding
+		average = np.where(self.repeats >= self.counted, self.previous, average)
+		average = np.where((self.negatives == 0) & (average < 0), 0., average)
+		average = np.where((self.negatives == self.counted) & (average > 0), 0., average)
+
+		self.value = np.where(self.counted >= self.window, average, np.nan)[()]
+
+		return self.value
+
+
+class EMA():
+	"""
+	Exponential moving average, one value at a time.
+	"""
+
+	def __init__(self, window):
+		self.window = window
+		self.alpha = 2 / (window + 1)
+		self.average = None
+		self.count = 0
+		self.value = np.nan
+
+	@property
+	def ready(self):
+		return self.count >= self.window
+
+	def update(self, value):
+		"""
+		:param value: <float> or <ndarray> Newest price
+		:return: <float> or <ndarray> Average ending at this price
+		"""
+
+		if self.average is None:
+			self.average = value + 0.
+		else:
+			self.average = self.average + self.alpha * (value - self.average)
+
+		self.count += 1
+		self.value = self.average if self.ready else missing(self.average)
+
+		return self.value
+
+
+class RollingStd():
+	"""
+	Rolling sample standard deviation, one value at a time.
+	"""
+
+	def __init__(self, window):
+		self.window = window
+		self.first = None
+		self.total = 0.
+		self.totalSquares = 0.
+		self.sums = [(0., 0.)] * (window + 1)
+		self.count = 0
+		self.value = np.nan
+
+	@property
+	def ready(self):
+		return self.count >= self.window
+
+	def update(self, value):
+		"""
+		:param value: <float> or <ndarray> Newest price
+		:return: <float> or <ndarray> Standard deviation of the window ending at this price
+		"""
+
+		if self.first is None:
+			self.first = value + 0.
+
+		shifted = value - self.first
+		self.total = self.total + shifted
+		self.totalSquares = self.totalSquares + shifted * shifted
+		self.count += 1
+		self.sums[self.count % (self.window + 1)] = (self.total, self.totalSquares)
+
+		if self.ready:
+			oldTotal, oldSquares = self.sums[(self.count - self.window) % (self.window + 1)]
+			total = self.total - oldTotal
+			totalSquares = self.totalSquares - oldSquares
+			self.value = np.sqrt(np.maximum((totalSquares - total * total / self.window) / (self.window - 1), 0))[()]
+		else:
+			self.value = missing(self.total)
+
+		return self.value
+
+
+class Bollinger():
+	"""
+	Bollinger bands, one value at a time.
+	"""
+
+	def __init__(self, window, width = 2):
+		self.width = width
+		self.middle = SMA(window)
+		self.std = RollingStd(window)
+		self.value = (np.nan, np.nan, np.nan)
+
+	@property
+	def ready(self):
+		return self.middle.ready
+
+	def update(self, value):
+		"""
+		:param value: <float> or <ndarray> Newest price
+		:return: <tuple> Middle, upper and lower bands
+		"""
+
+		middle = self.middle.update(value)
+		std = self.std.update(value)
+		self.value = (middle, middle + self.width * std, middle - self.width * std)
+
+		return self.value
+
+
+class RSI():
+	"""
+	Wilder's relative strength index, one value at a time.
+	"""
+
+	def __init__(self, window = 14):
+		self.window = window
+		self.previous = None
+		self.gains = 0.
+		self.losses = 0.
+		self.count = 0
+		self.value = np.nan
+
+	@property
+	def ready(self):
+		return self.count >= self.window
+
+	def update(self, value):
+		"""
+		:param value: <float> or <ndarray> Newest price
+		:return: <float> or <ndarray> RSI (0 to 100) at this price
+		"""
+
+		if self.previous is None:
+			self.previous = value
+			self.value = missing(value + 0.)
+			return self.value
+
+		change = value - self.previous
+		gain = np.maximum(change, 0.)[()]
+		loss = np.maximum(-change, 0.)[()]
+		self.previous = value
+		self.count += 1
+
+		if self.count < self.window:
+			# Sum up the first window of changes
+			self.gains = self.gains + gain
+			self.losses = self.losses + loss
+			self.value = missing(self.gains)
+
+		elif self.count == self.window:
+			self.gains = (self.gains + gain) / self.window
+			self.losses = (self.losses + loss) / self.window
+			self.value = rsi_value(self.gains, self.losses)
+
+		else:
+			self.gains = self.gains + (gain - self.gains) / self.window
+			self.losses = self.losses + (loss - self.losses) / self.window
+			self.value = rsi_value(self.gains, self.losses)
+
+		return self.value
@@ -0,0 +1,199 @@
+import threading
+import math
+import time
+
+# Histogram buckets grow by this factor from the smallest one up
+BUCKET_FACTOR = 2 ** .25
+SMALLEST_BUCKET = 1e-6
+BUCKETS = 128
+
+
+
+
+class Histogram():
+	"""
+	Latency histogram with log spaced buckets. Recording is a log and an
+	add, and quantiles are read back from the buckets to within one
+	bucket width (about 19%).
+	"""
+
+	def __init__(self):
+		self.counts = [0] * BUCKETS
+		self.count = 0
+		self.total = 0.
+		self.max = 0.
+
+	def record(self, seconds):
+		"""
+		:param seconds: <float> Time taken
+		"""
+
+		bucket = int(math.log(seconds / SMALLEST_BUCKET, BUCKET_FACTOR)) + 1 if seconds > SMALLEST_BUCKET else 0
+		self.counts[min(bucket, BUCKETS - 1)] += 1
+		self.count += 1
+		self.total += seconds
+		if seconds > self.max:
+			self.max = seconds
+
+	def quantile(self, q):
+		"""
+		:param q: <float> Quantile between 0 and 1 (ex: .99)
+		:return: <float> Upper edge of the bucket holding the quantile, capped at the slowest time seen
+		"""
+
+		if self.count == 0:
+			return 0.
+
+		target = q * self.count
+		seen = 0
+		for bucket, count in enumerate(self.counts):
+			seen += count
+			if seen >= target and count:
+				return min(SMALLEST_BUCKET * BUCKET_FACTOR ** bucket, self.max)
+
+		return self.max
+
+	def summary(self):
+		"""
+		:return: <dict> count, mean, p50, p99 and max seconds
+		"""
+
+		return {'count': self.count, 'mean': self.total / self.count if self.count else 0.,
+				'p50': self.quantile(.5), 'p99': self.quantile(.99), 'max': self.max}
+
+
+
+
+class Span():
+	"""
+	Times a block of code into a histogram.
+	"""
+
+	__slots__ = ('instruments', 'name', 'start')
+
+	def __init__(self, instruments, name):
+		self.instruments = instruments
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *args):
+		self.instruments.record(self.name, time.perf_counter() - self.start)
+
+
+
+
+class NullSpan():
+	"""
+	Stands in for Span while instrumentation is off.
+	"""
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		pass
+
+
+NULL_SPAN = NullSpan()
+
+
+
+
+class Instruments():
+	"""
+	Named latency histograms for the trading loop and api calls.
+	While turned off span() hands back one shared do-nothing span and
+	record() returns straight away, so the cost is an attribute check.
+	"""
+
+	def __init__(self, enabled = False):
+		self.enabled = enabled
+		self.histograms = {}
+		self.lock = threading.Lock()
+
+	def enable(self, enabled = True):
+		"""
+		:param enabled: <bool> Whether to record timings
+		"""
+
+		self.enabled = enabled
+
+	def reset(self):
+		"""
+		Throw away everything recorded so far
+		"""
+
+		with self.lock:
+			self.histograms = {}
+
+	def span(self, name):
+		"""
+		Time a block of code:
+
+			with INSTRUMENTS.span('trader.ticker'):
+				...
+
+		:param name: <str> Name of the histogram to record into
+		:return: <Span> Context manager
+		"""
+
+		return Span(self, name) if self.enabled else NULL_SPAN
+
+	def record(self, name, seconds):
+		"""
+		:param name: <str> Name of the histogram to record into
+		:param seconds: <float> Time taken
+		"""
+
+		if not self.enabled:
+			return
+
+		with self.lock:
+			histogram = self.histograms.get(name)
+			if histogram is None:
+				histogram = self.histograms[name] = Histogram()
+			histogram.record(seconds)
+
+	def summary(self):
+		"""
+		:return: <dict> Name to count, mean, p50, p99 and max seconds
+		"""
+
+		with self.lock:
+			return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+	def report(self):
+		"""
+		:return: <str> One line per histogram for dumping to a log
+		"""
+
+		return '\n'.join(f"{name:<28}n={stats['count']:<8} p50={stats['p50'] * 1e3:.3f}ms "
+						f"p99={stats['p99'] * 1e3:.3f}ms max={stats['max'] * 1e3:.3f}ms"
+						for name, stats in self.summary().items())
+
+	def prometheus(self, metric = 'bittrading_latency_seconds'):
+		"""
+		:param metric: <str> Name of the exported metric
+		:return: <str> Every histogram as a Prometheus text format summary
+		"""
+
+		lines = [f'# HELP {metric} Time spent in each stage of the trading loop and api call',
+				f'# TYPE {metric} summary']
+
+		with self.lock:
+			for name, histogram in sorted(self.histograms.items()):
+				for q in (.5, .99):
+					lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {histogram.quantile(q)!r}')
+				lines.append(f'{metric}_sum{{span="{name}"}} {histogram.total!r}')
+				lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+
+		return '\n'.join(lines) + '\n'
+
+
+# Shared by every module, turned on with INSTRUMENTS.enable()
+INSTRUMENTS = Instruments()
@@ -0,0 +1,249 @@
+from Backtester import FEE
+from EventLog import NULL_LOG
+import threading
+import time
+
+
+
+
+class Ledger():
+	"""
+	Local copy of the account's balances kept up to date from our own orders.
+	Balances are fetched once, then every order placed reserves its funds and
+	every fill seen moves them, so reading a balance never waits on Bittrex.
+
+	reconcile() makes one getopenorders call for partial fills, and only looks
+	up the history of markets where one of our orders has closed since.
+	check() compares against getbalances and takes Bittrex's numbers whenever
+	they have drifted apart (ex: an order placed on the website).
+	"""
+
+	def __init__(self, bittrex, reconcileEvery = 30, checkEvery = 600, tolerance = 1e-8, events = None):
+		"""
+		:param bittrex: <Bittrex> Client to reconcile with
+		:param reconcileEvery: <float> Seconds between reconciles in refresh
+		:param checkEvery: <float> Seconds between balance checks in refresh
+		:param tolerance: <float> Difference allowed before a balance counts as drifted
+		:param events: <EventLog> Log to record balances and drift to
+		"""
+
+		self.Bittrex = bittrex
+		self.reconcileEvery = reconcileEvery
+		self.checkEvery = checkEvery
+		self.tolerance = tolerance
+		self.events = NULL_LOG if events is None else events
+		self.lock = threading.RLock()
+
+		# Currency to total balance and to the part held by open orders
+		self.totals = {}
+		self.reserved = {}
+
+		# Open orders we know of, uuid to what has been applied so far
+		self.orders = {}
+
+		self.loaded = False
+		self.reconciled = None
+		self.checked = None
+
+
+	def load(self):
+		"""
+		Start from Bittrex's balances and open orders
+		"""
+
+		balances = self.Bittrex.get_balances()['result'] or []
+		openOrders = self.Bittrex.get_open_orders('')['result'] or []
+
+		with self.lock:
+			self.totals = {balance['Currency']: balance['Balance'] for balance in balances}
+			self.reserved = {}
+			self.orders = {}
+
+			# Fills so far are already in the balances, only take the reservations
+			for order in openOrders:
+				self.apply(order, True, seed = True)
+
+			self.loaded = True
+			self.reconciled = self.checked = time.monotonic()
+
+		self.events.balances(self.balances())
+
+
+	def available(self, currency):
+		"""
+		:param currency: <str> Currency (ex: BTC)
+		:return: <float> Balance not held by open orders
+		"""
+
+		if not self.loaded:
+			self.load()
+
+		return self.totals.get(currency, 0.) - self.reserved.get(currency, 0.)
+
+
+	def balances(self):
+		"""
+		:return: <dict> Currency to available balance, like Trader.get_balances used to fetch
+		"""
+
+		if not self.loaded:
+			self.load()
+
+		with self.lock:
+			return {currency: total - self.reserved.get(currency, 0.) for currency, total in self.totals.items()}
+
+
+	def apply(self, order, isOpen, seed = False):
+		"""
+		Bring the ledger up to date with an order as Bittrex reports it. Only
+		what changed since the order was last applied moves the balances.
+
+		:param order: <dict> Order from getorder, getopenorders or getorderhistory
+		:param isOpen: <bool> Whether the order is still open
+		:param seed: <bool> Only record the order, its fills are already in the balances
+		"""
+
+		uuid = order['OrderUuid']
+		base, secondary = order['Exchange'].split('-')
+		buying = (order.get('Type') or order.get('OrderType')).endswith('BUY')
+
+		filled = order['Quantity'] - order['QuantityRemaining']
+		price = order.get('Price') or 0.
+		commission = order.get('CommissionPaid', order.get('Commission')) or 0.
+
+		# What the order still holds: the base to pay for a buy, the coins of a sell
+		currency = base if buying else secondary
+		held = 0.
+		if isOpen:
+			held = order['QuantityRemaining'] * order['Limit'] * (1 + FEE) if buying else order['QuantityRemaining']
+
+		with self.lock:
+			known = self.orders.pop(uuid, None) or {'filled': 0., 'price': 0., 'commission': 0., 'held': 0.}
+
+			if not seed:
+				filledChange = filled - known['filled']
+				priceChange = price - known['price']
+				commissionChange = commission - known['commission']
+
+				if buying:
+					self.totals[base] = self.totals.get(base, 0.) - priceChange - commissionChange
+					self.totals[secondary] = self.totals.get(secondary, 0.) + filledChange
+				else:
+					self.totals[secondary] = self.totals.get(secondary, 0.) - filledChange
+					self.totals[base] = self.totals.get(base, 0.) + priceChange - commissionChange
+
+			self.reserved[currency] = self.reserved.get(currency, 0.) + held - known['held']
+
+			if isOpen:
+				self.orders[uuid] = {'market': order['Exchange'], 'filled': filled, 'price': price,
+									'commission': commission, 'held': held}
+
+
+	def acknowledge(self, market, side, quantity, rate, response):
+		"""
+		Record an order Bittrex accepted, holding its funds straight away.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param side: <str> buy or sell
+		:param quantity: <float> Amount ordered
+		:param rate: <float> Limit rate
+		:param response: <dict> Bittrex response to placing it
+		"""
+
+		if not response.get('success'):
+			return
+
+		if not self.loaded:
+			self.load()
+
+		self.apply({'OrderUuid': response['result']['uuid'], 'Exchange': market, 'Type': 'LIMIT_' + side.upper(),
+					'Quantity': quantity, 'QuantityRemaining': quantity, 'Limit': rate}, True)
+
+
+	def reconcile(self):
+		"""
+		Apply fills since the last reconcile. Still open orders come from one
+		getopenorders call, orders that closed from the order history of
+		their market, or getorder when they are too old for it.
+
+		:return: <int> Number of our orders that closed
+		"""
+
+		if not self.loaded:
+			self.load()
+
+		openOrders = self.Bittrex.get_open_orders('')['result'] or []
+
+		# Orders placed somewhere else since loading are picked up here too
+		for order in openOrders:
+			self.apply(order, True)
+
+		openIds = {order['OrderUuid'] for order in openOrders}
+		with self.lock:
+			closed = {uuid: known['market'] for uuid, known in self.orders.items() if uuid not in openIds}
+		count = len(closed)
+
+		for market in set(closed.values()):
+			for order in self.Bittrex.get_order_history(market)['result'] or []:
+				if closed.pop(order['OrderUuid'], None) is not None:
+					self.apply(order, False)
+
+		for uuid in list(closed):
+			response = self.Bittrex.get_order(uuid)
+			if response['success']:
+				self.apply(response['result'], response['result']['IsOpen'])
+
+		self.reconciled = time.monotonic()
+
+		return count
+
+
+	def check(self):
+		"""
+		Reconcile, then compare against Bittrex's balances and take them where they drifted.
+
+		:return: <dict> Currency to (local, Bittrex) available balance of every drifted currency
+		"""
+
+		# Fills not applied yet would look like drift
+		self.reconcile()
+
+		exchange = {balance['Currency']: balance for balance in self.Bittrex.get_balances()['result'] or []}
+		drifted = {}
+
+		with self.lock:
+			local = self.balances()
+
+			for currency in set(exchange) | set(local):
+				balance = exchange.get(currency, {'Balance': 0., 'Available': 0.})
+
+				if abs(local.get(currency, 0.) - balance['Available']) > self.tolerance:
+					drifted[currency] = (local.get(currency, 0.), balance['Available'])
+
+					# Bittrex is right, hold back whatever it says is not available
+					self.totals[currency] = balance['Balance']
+					self.reserved[currency] = balance['Balance'] - balance['Available']
+
+		self.checked = time.monotonic()
+
+		for currency, (localBalance, exchangeBalance) in drifted.items():
+			self.events.log('drift', currency = currency, local = localBalance, exchange = exchangeBalance)
+
+		return drifted
+
+
+	def refresh(self):
+		"""
+		Reconcile and check whenever they are due. Cheap to call every tick.
+		"""
+
+		if not self.loaded:
+			return self.load()
+
+		now = time.monotonic()
+
+		if now - self.reconciled >= self.reconcileEvery:
+			self.reconcile()
+
+		if now - self.checked >= self.checkEvery:
+			self.check()
@@ -0,0 +1,155 @@
+from decimal import Context, Decimal, ROUND_DOWN
+import threading
+import math
+import time
+
+# Bittrex takes quantities and rates to 8 decimal places
+PRECISION = 8
+
+# Enough digits to cut any finite float down to PRECISION places (the largest has 309 before the point)
+DECIMAL_CONTEXT = Context(prec = 400, rounding = ROUND_DOWN)
+
+# Smallest order total Bittrex takes in each base currency (50,000 satoshi in BTC markets)
+MIN_ORDER_VALUE = {'BTC': .0005}
+
+
+
+
+def rejected(message):
+	"""
+	:param message: <str> Bittrex error message (ex: MIN_TRADE_REQUIREMENT_NOT_MET)
+	:return: <dict> Response shaped like the one Bittrex would have sent
+	"""
+
+	return {'success': False, 'message': message, 'result': None}
+
+
+def round_down(value, places = PRECISION):
+	"""
+	:param value: <float> Quantity to round
+	:param places: <int> Decimal places to keep
+	:return: <float> Value cut down to the given places, never more than it was (NaN and infinities as they are)
+	"""
+
+	if not math.isfinite(value):
+		return value
+
+	# Cut the shortest decimal that reads back as the float, so 0.29 stays 0.29 instead of becoming 0.28999999
+	return float(Decimal(repr(float(value))).quantize(Decimal(1).scaleb(-places), context = DECIMAL_CONTEXT))
+
+
+
+
+class MarketInfo():
+	"""
+	Local copy of getmarkets and getcurrencies, fetched again once older than
+	ttl seconds. Looking a market up is a dict lookup, and orders are checked
+	and rounded against it before being sent so orders Bittrex would reject
+	never cost a round trip.
+	"""
+
+	def __init__(self, bittrex, ttl = 3600):
+		"""
+		:param bittrex: <Bittrex> Client to fetch with
+		:param ttl: <float> Seconds to keep the metadata before fetching it again
+		"""
+
+		self.Bittrex = bittrex
+		self.ttl = ttl
+		# Time of the last successful fetch, None until there has been one
+		self.fetched = None
+		self.markets = {}
+		self.currencies = {}
+		self.lock = threading.Lock()
+
+
+	def refresh(self):
+		"""
+		Fetch every market and currency again. When either fetch fails what was
+		fetched before is kept and the next lookup tries again.
+
+		:return: <bool> Whether both fetches succeeded
+		"""
+
+		markets = self.Bittrex.get_markets()
+		currencies = self.Bittrex.get_currencies()
+
+		if not (markets.get('success') and markets.get('result') is not None
+				and currencies.get('success') and currencies.get('result') is not None):
+			print('market metadata fetch failed: {} {}'.format(markets.get('message'), currencies.get('message')))
+			return False
+
+		self.markets = {market['MarketName']: market for market in markets['result']}
+		self.currencies = {currency['Currency']: currency for currency in currencies['result']}
+		self.fetched = time.monotonic()
+
+		return True
+
+
+	def get(self, market):
+		"""
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:return: <dict> The market as returned by getmarkets, None if there is no such market
+				 or nothing could be fetched yet
+		"""
+
+		if self.fetched is None or time.monotonic() - self.fetched > self.ttl:
+			# Orders placed together should only fetch it once
+			with self.lock:
+				if self.fetched is None or time.monotonic() - self.fetched > self.ttl:
+					self.refresh()
+
+		return self.markets.get(market)
+
+
+	def online(self, market):
+		"""
+		:return: <bool> Whether the market and both its currencies are active
+		"""
+
+		info = self.get(market)
+
+		if info is None or not info.get('IsActive', True):
+			return False
+
+		return all(self.currencies.get(currency, {}).get('IsActive', True) for currency in market.split('-'))
+
+
+	def validate(self, market, quantity, rate):
+		"""
+		Round an order to what Bittrex takes and check it would be accepted.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param quantity: <float> The amount to trade
+		:param rate: <float> The rate to trade at
+		:return: <float> Rounded quantity, <float> Rounded rate, <dict> Bittrex shaped error (None when the order is fine)
+		"""
+
+		if not math.isfinite(quantity):
+			return quantity, rate, rejected('INVALID_QUANTITY')
+		if not math.isfinite(rate):
+			return quantity, rate, rejected('INVALID_RATE')
+
+		info = self.get(market)
+
+		if info is None and self.fetched is None:
+			# Nothing known about any market yet, leave it to Bittrex rather than block every order
+			info = {}
+		elif info is None:
+			return quantity, rate, rejected('INVALID_MARKET')
+		elif not self.online(market):
+			return quantity, rate, rejected('MARKET_OFFLINE')
+
+		quantity = round_down(quantity)
+		rate = round(rate, PRECISION)
+
+		if quantity <= 0:
+			return quantity, rate, rejected('QUANTITY_NOT_PROVIDED')
+		if rate <= 0:
+			return quantity, rate, rejected('RATE_NOT_PROVIDED')
+		if quantity < (info.get('MinTradeSize') or 0):
+			return quantity, rate, rejected('MIN_TRADE_REQUIREMENT_NOT_MET')
+		if quantity * rate < MIN_ORDER_VALUE.get(info.get('BaseCurrency', market.split('-')[0]), 0):
+			return quantity, rate, rejected('DUST_TRADE_DISALLOWED_MIN_VALUE_50K_SAT')
+
+		return quantity, rate, None
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+BUY = 'buy'
+SELL = 'sell'
+
+
+
+
+class OrderBook():
+	"""
+	Local copy of a market's order book held as sorted NumPy arrays.
+	Bids are kept highest rate first and asks lowest rate first, so both
+	sides start at the best price. Cumulative quantities are worked out on
+	update so depth and VWAP queries are a binary search.
+	"""
+
+	def __init__(self, market = None):
+		self.market = market
+		self.prices = {BUY: np.empty(0), SELL: np.empty(0)}
+		self.quantities = {BUY: np.empty(0), SELL: np.empty(0)}
+		self.depth = {BUY: np.empty(0), SELL: np.empty(0)}
+
+
+	def update(self, book):
+		"""
+		Replace the book with a new snapshot.
+
+		:param book: <dict> Result of getorderbook with type both, buy and sell lists of Quantity and Rate
+		:return: <OrderBook> Itself
+		"""
+
+		for side in (BUY, SELL):
+			orders = book.get(side) or []
+			prices = np.fromiter((order['Rate'] for order in orders), dtype = np.float64, count = len(orders))
+			quantities = np.fromiter((order['Quantity'] for order in orders), dtype = np.float64, count = len(orders))
+
+			# Bittrex already sends both sides best price first, only sort when it did not
+			key = -prices if side == BUY else prices
+			if np.any(key[1:] < key[:-1]):
+				order = np.argsort(key, kind = 'stable')
+				prices = prices[order]
+				quantities = quantities[order]
+
+			self.prices[side] = prices
+			self.quantities[side] = quantities
+			self.depth[side] = np.cumsum(quantities)
+
+		return self
+
+
+	def count(self, side, price):
+		"""
+		Number of levels at the given price or better.
+		Better is higher for bids and lower for asks.
+
+		:param side: <str> buy or sell
+		:param price: <float> Price threshold
+		:return: <int> Number of levels
+		"""
+
+		if side == BUY:
+			return int(np.searchsorted(-self.prices[BUY], -price, side = 'right'))
+
+		return int(np.searchsorted(self.prices[SELL], price, side = 'right'))
+
+
+	def best(self, side):
+		"""
+		:param side: <str> buy or sell
+		:return: <float> Best bid or ask, None if that side is empty
+		"""
+
+		prices = self.prices[side]
+
+		return float(prices[0]) if len(prices) else None
+
+
+	def levels(self, side, price):
+		"""
+		Levels at the given price or better, best first.
+
+		:param side: <str> buy or sell
+		:param price: <float> Price threshold
+		:return: <ndarray>, <ndarray> Prices and quantities of each level
+		"""
+
+		count = self.count(side, price)
+
+		return self.prices[side][:count], self.quantities[side][:count]
+
+
+	def depth_to(self, side, price):
+		"""
+		Total quantity available at the given price or better.
+
+		:param side: <str> buy or sell
+		:param price: <float> Price threshold
+		:return: <float> Cumulative quantity
+		"""
+
+		count = self.count(side, price)
+
+		return float(self.depth[side][count - 1]) if count else 0.
+
+
+	def vwap(self, side, quantity):
+		"""
+		Average price of filling the given quantity against one side of the book.
+
+		:param side: <str> buy or sell (the side being filled against)
+		:param quantity: <float> Quantity to fill
+		:return: <float> Volume weighted average price, NaN if the book is not deep enough
+		"""
+
+		depth = self.depth[side]
+
+		if quantity <= 0 or len(depth) == 0 or depth[-1] < quantity:
+			return np.nan
+
+		# Every level before the one that finishes the fill is taken whole
+		last = int(np.searchsorted(depth, quantity, side = 'left'))
+		prices = self.prices[side]
+		filled = depth[last - 1] if last else 0.
+		cost = np.dot(prices[:last], self.quantities[side][:last]) + (quantity - filled) * prices[last]
+
+		return float(cost / quantity)
+
+
+	def to_frame(self, side = None):
+		"""
+		The book as a DataFrame like the one getorderbook used to be turned into.
+
+		:param side: <str> buy or sell (defaults to both)
+		:return: <DataFrame> Quantity, Rate and type columns
+		"""
+
+		sides = [BUY, SELL] if side is None else [side]
+
+		return pd.DataFrame({'Quantity': np.concatenate([self.quantities[s] for s in sides]),
+							'Rate': np.concatenate([self.prices[s] for s in sides]),
+							'type': np.repeat(sides, [len(self.prices[s]) for s in sides])})
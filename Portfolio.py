@@ -0,0 +1,221 @@
+from Bittrex import Bittrex, API_URL
+from BulkLoader import BulkLoader
+from CandleStore import INTERVALS
+from Indicators import SMA
+from Instrumentation import INSTRUMENTS
+from EventLog import EventLog, NULL_LOG
+from MarketInfo import MarketInfo
+from Ledger import Ledger
+from Scheduler import Scheduler
+from Trader import Trader
+import numpy as np
+import json
+
+
+
+
+class Portfolio():
+	"""
+	Used for live trading many markets from one process.
+	Each tick makes one getmarketsummaries call for every market's prices and
+	reads balances from one Ledger shared by all of them, then runs the trailing average
+	strategy for every market at once on arrays. Orders are placed through
+	a Trader per market that shares the same Bittrex client.
+	"""
+
+	def __init__(self, secrets, markets, ttl = 5, events = None, bittrex = None, api_url = API_URL):
+		"""
+		:param secrets: <dict> Bittrex api secrets
+		:param markets: <list> String literals for the markets (ex: BTC-LTC)
+		:param ttl: <float> Seconds each Trader keeps its cached prices
+		:param events: <EventLog> Log to record decisions, orders and balances to
+		:param bittrex: <Bittrex> Client shared by every market (defaults to a new one)
+		:param api_url: <str> Where to send requests when making the client (ex: a Simulator's url)
+		"""
+
+		self.secrets = secrets
+		self.Bittrex = Bittrex(secrets, api_url = api_url) if bittrex is None else bittrex
+		self.markets = list(markets)
+		self.events = NULL_LOG if events is None else events
+		self.info = MarketInfo(self.Bittrex)
+		self.ledger = Ledger(self.Bittrex, events = self.events)
+		self.traders = {market: Trader(secrets, market, ttl, self.Bittrex, self.events, self.info, self.ledger)
+						for market in self.markets}
+		self.bases = [self.traders[market].base for market in self.markets]
+		self.secondaries = [self.traders[market].secondary for market in self.markets]
+		self.moving_average = None
+
+		# Last good Last of every market and the markets missing one right now
+		self.last_good = None
+		self.missing = set()
+
+
+	def get_summaries(self):
+		"""
+		Get the current Bid, Ask and Last of every market with one request.
+
+		:return: <dict> Market to summary, <ndarray> Bids, <ndarray> Asks, <ndarray> Lasts
+				 (the arrays line up with self.markets, NaN for markets missing from the summaries)
+		"""
+
+		summaries = {summary['MarketName']: summary for summary in self.Bittrex.get_market_summaries()['result']}
+
+		prices = np.array([[summaries[market][key] if market in summaries and summaries[market][key] is not None else np.nan
+							for market in self.markets] for key in ('Bid', 'Ask', 'Last')], dtype = np.float64)
+
+		return summaries, prices[0], prices[1], prices[2]
+
+
+	def get_balances(self):
+		"""
+		Get list of available balances for all coins you own from the
+		ledger shared by every market, reconciling it when due
+
+		:return: <dict> Available balances
+		"""
+
+		self.ledger.refresh()
+
+		return self.ledger.balances()
+
+
+	def warmup(self, num, timeInterval = 'fiveMin'):
+		"""
+		Build up the moving average of every market straight away from the
+		latest historical candles, downloaded concurrently.
+
+		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
+		:param timeInterval: <str> String literal time delta of each data point (ex: fiveMin)
+		:return: <SMA> Moving average of every market
+		"""
+
+		# Candles that don't line up with the other markets' hold the close before them
+		closes = BulkLoader(self.secrets, timeInterval, bittrex = self.Bittrex).wide(self.markets, 'C').reindex(columns = self.markets).ffill().values[-num:]
+
+		self.moving_average = SMA(num)
+		for row in closes:
+			self.moving_average.update(row)
+
+		self.last_good = closes[-1].copy() if len(closes) else np.full(len(self.markets), np.nan)
+		self.track_missing(np.isnan(closes).any(axis = 0) if len(closes) else np.ones(len(self.markets), dtype = bool))
+
+		return self.moving_average
+
+
+	def track_missing(self, gaps):
+		"""
+		Print and log the markets that just went missing or came back.
+
+		:param gaps: <ndarray> True for every market without a price
+		"""
+
+		missing = {self.markets[i] for i in np.flatnonzero(gaps).tolist()}
+
+		for market in sorted(missing - self.missing):
+			print('{} has no price, holding its last one'.format(market))
+			self.events.log('missing', market = market)
+
+		for market in sorted(self.missing - missing):
+			self.events.log('recovered', market = market)
+
+		self.missing = missing
+
+
+	def hold_missing(self, last_trade):
+		"""
+		Hold each market's last good Last where this tick has none (NaN when a
+		market is missing from getmarketsummaries or its Last is null), so one
+		gap doesn't keep that market's average NaN for a whole window.
+
+		:param last_trade: <ndarray> Last of every market
+		:return: <ndarray> Last with the missing ones replaced by the last good one
+		"""
+
+		gaps = np.isnan(last_trade)
+		self.track_missing(gaps)
+
+		if self.last_good is not None:
+			last_trade = np.where(gaps, self.last_good, last_trade)
+
+		self.last_good = last_trade
+
+		return last_trade
+
+
+	def tick(self):
+		"""
+		One step of the Simple Trailing (T) Average Strategy for every market.
+		Needs warmup to have been called first.
+
+		:return: <ndarray> 1 for every market sold, -1 for every market bought, 0 otherwise
+		"""
+
+		# Get every market's prices and every balance in one go
+		with INSTRUMENTS.span('portfolio.summaries'):
+			summaries, current_bid, current_ask, last_trade = self.get_summaries()
+			last_trade = self.hold_missing(last_trade)
+		with INSTRUMENTS.span('portfolio.balances'):
+			balances = self.get_balances()
+
+		# Drop oldest value add current and calculate every market's moving average
+		with INSTRUMENTS.span('portfolio.indicator'):
+			current_average = self.moving_average.update(last_trade)
+
+		secondaryBalance = np.array([balances.get(currency, 0.) for currency in self.secondaries])
+		baseBalance = np.array([balances.get(currency, 0.) for currency in self.bases])
+
+		# Sell where the bid is above the average and holding Secondary,
+		# buy where the ask is below it and holding Base
+		sell = (current_bid > current_average) & (secondaryBalance > 0)
+		buy = (current_ask < current_average) & (baseBalance > 0) & ~sell
+
+		decisions = sell.astype(np.int8) - buy.astype(np.int8)
+
+		for i in np.flatnonzero(decisions).tolist():
+			market = self.markets[i]
+			trader = self.traders[market]
+			trader.snapshot(summaries[market])
+
+			self.events.decision(market, 'sell' if sell[i] else 'buy', bid = float(current_bid[i]), ask = float(current_ask[i]),
+								last = float(last_trade[i]), average = float(current_average[i]))
+
+			if sell[i]:
+				trader.sell(current_average[i])
+			else:
+				trader.buy(current_average[i])
+
+		return decisions
+
+
+	def trailing_average(self, num, timeInterval = 'fiveMin', scheduler = None):
+		"""
+		Simple Trailing (T) Average Strategy on every market.
+		Ticks right after each candle closes, see Trader.trailing_average.
+
+		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
+		:param timeInterval: <str> String literal time delta between ticks (ex: fiveMin)
+		:param scheduler: <Scheduler> Scheduler to add the tick to (defaults to running one here)
+		"""
+
+		self.warmup(num, timeInterval)
+
+		if scheduler is not None:
+			return scheduler.add('portfolio', self.tick, INTERVALS[timeInterval])
+
+		scheduler = Scheduler()
+		scheduler.add('portfolio', self.tick, INTERVALS[timeInterval])
+		scheduler.run()
+
+
+
+
+if __name__ == '__main__':
+
+	with open('./database/secrets.json') as file:
+		secrets = json.load(file)
+		file.close()
+
+	with EventLog('Portfolio') as log:
+		portfolio = Portfolio(secrets, ['BTC-RVN', 'BTC-LTC', 'BTC-ETH'], events = log)
+
+		portfolio.trailing_average(7)
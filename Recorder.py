@@ -0,0 +1,304 @@
+from AsyncBittrex import AsyncBittrex
+from Bittrex import load_secrets
+from CandleStore import read_columns, append_columns
+from Instrumentation import INSTRUMENTS
+from OrderBook import OrderBook, BUY, SELL
+from TradeTape import TRADE_COLUMNS, new_trades
+import numpy as np
+import asyncio
+import shutil
+import time
+import os
+
+DAY_MS = 86400 * 1000
+
+# Times are kept as milliseconds since epoch
+TICKER_COLUMNS = {'T': np.int64, 'Bid': np.float64, 'Ask': np.float64, 'Last': np.float64, 'BaseVolume': np.float64}
+
+
+
+
+def book_columns(depth):
+	"""
+	:param depth: <int> Levels kept of each side
+	:return: <dict> Column name to dtype of an order book snapshot, rates and quantities hold depth values per row
+	"""
+
+	return {'T': np.int64, 'BidRate': (np.float64, (depth,)), 'BidQuantity': (np.float32, (depth,)),
+			'AskRate': (np.float64, (depth,)), 'AskQuantity': (np.float32, (depth,))}
+
+
+def book_snapshot(book, depth, now):
+	"""
+	:param book: <dict> Result of getorderbook with type both
+	:param depth: <int> Levels kept of each side, missing levels are NaN
+	:param now: <int> Milliseconds since epoch the book was fetched
+	:return: <dict> Column name to array of one row (see book_columns)
+	"""
+
+	orderBook = OrderBook().update(book or {})
+	snapshot = {'T': np.array([now], dtype = np.int64)}
+
+	for side, name in ((BUY, 'Bid'), (SELL, 'Ask')):
+		for values, column in ((orderBook.prices[side], 'Rate'), (orderBook.quantities[side], 'Quantity')):
+			row = np.full((1, depth), np.nan)
+			row[0, :min(depth, len(values))] = values[:depth]
+			snapshot[name + column] = row
+
+	return snapshot
+
+
+
+
+class Recorder():
+	"""
+	Records the tickers, top of the order book and trade tape of many markets
+	so backtests can replay real depth and trades later.
+
+	Every interval one getmarketsummaries call plus a getorderbook and
+	getmarkethistory call per market are sent concurrently through AsyncBittrex.
+	Trades are deduped by Id. Everything is appended to column files (the same
+	layout as CandleStore) in one folder per market, day and table, so a day
+	of a market stays bounded: about 4.5MB of 20 level books at a 10 second
+	interval, 40 bytes per ticker and 33 bytes per trade. Days older than
+	keepDays are deleted.
+	"""
+
+	def __init__(self, secrets, markets, path = './database/recorder', depth = 20, interval = 10,
+				keepDays = None, concurrency = 10, rate = 10):
+		"""
+		:param secrets: <dict> Bittrex api secrets
+		:param markets: <list> String literals for the markets (ex: BTC-LTC)
+		:param path: <str> Folder to record into
+		:param depth: <int> Order book levels kept of each side
+		:param interval: <float> Seconds between polls
+		:param keepDays: <int> Days of recordings to keep (defaults to all)
+		:param concurrency: <int> Most requests in flight at once
+		:param rate: <float> Most requests sent per second
+		"""
+
+		self.secrets = secrets
+		self.markets = list(markets)
+		self.path = path
+		self.depth = depth
+		self.interval = interval
+		self.keepDays = keepDays
+		self.concurrency = concurrency
+		self.rate = rate
+		self.running = False
+
+		self.tables = {'trades': TRADE_COLUMNS, 'ticker': TICKER_COLUMNS, 'book': book_columns(depth)}
+
+		# Id of the newest trade recorded in each market, picked up from earlier recordings
+		self.lastIds = {market: self.last_id(market) for market in self.markets}
+
+
+	def folder(self, market, day, table):
+		"""
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param day: <int> Days since epoch
+		:param table: <str> trades, ticker or book
+		:return: <str> Folder holding the table of that market and day
+		"""
+
+		return os.path.join(self.path, market, str(np.datetime64(int(day), 'D')), table)
+
+
+	def days(self, market):
+		"""
+		:return: <list> Days since epoch recorded for the market, oldest first
+		"""
+
+		try:
+			names = os.listdir(os.path.join(self.path, market))
+		except FileNotFoundError:
+			return []
+
+		return sorted(int(np.datetime64(name, 'D').astype(np.int64)) for name in names)
+
+
+	def last_id(self, market):
+		"""
+		:return: <int> Id of the newest trade recorded in the market, None if there are none
+		"""
+
+		for day in reversed(self.days(market)):
+			ids = read_columns(self.folder(market, day, 'trades'), TRADE_COLUMNS, ['Id'])['Id']
+			if len(ids):
+				return int(ids[-1])
+
+		return None
+
+
+	def store(self, market, table, rows):
+		"""
+		Append rows to a table, split over the days they fall in.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param table: <str> trades, ticker or book
+		:param rows: <dict> Column name to array of rows in time order
+		:return: <int> Number of rows added
+		"""
+
+		days = rows['T'] // DAY_MS
+		edges = np.flatnonzero(np.diff(days)) + 1
+		added = 0
+
+		for start, end in zip(np.concatenate(([0], edges)).tolist(), np.concatenate((edges, [len(days)])).tolist()):
+			if end > start:
+				added += append_columns(self.folder(market, days[start], table), self.tables[table],
+										{column: values[start:end] for column, values in rows.items()})
+
+		return added
+
+
+	def read(self, market, table, start = None, end = None):
+		"""
+		Load a recorded table of a market.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param table: <str> trades, ticker or book
+		:param start: <str> First day to load (ex: 2018-08-27, defaults to the first recorded)
+		:param end: <str> Last day to load (defaults to the last recorded)
+		:return: <dict> Column name to array, T as milliseconds since epoch
+		"""
+
+		first = -np.inf if start is None else np.datetime64(start, 'D').astype(np.int64)
+		last = np.inf if end is None else np.datetime64(end, 'D').astype(np.int64)
+
+		parts = [read_columns(self.folder(market, day, table), self.tables[table])
+				for day in self.days(market) if first <= day <= last]
+		parts = [part for part in parts if len(part['T'])]
+
+		if not parts:
+			return {column: np.empty(0, dtype = dtype) for column, dtype in self.tables[table].items()}
+
+		return {column: np.concatenate([part[column] for part in parts]) for column in self.tables[table]}
+
+
+	def record(self, summaries, books, histories, now):
+		"""
+		Store the results of one poll.
+
+		:param summaries: <list> Result of getmarketsummaries
+		:param books: <dict> Market to getorderbook result
+		:param histories: <dict> Market to getmarkethistory result
+		:param now: <int> Milliseconds since epoch of the poll
+		:return: <int> Number of new trades recorded
+		"""
+
+		summaries = {summary['MarketName']: summary for summary in summaries or []}
+		recorded = 0
+
+		for market in self.markets:
+			summary = summaries.get(market)
+			if summary is not None:
+				self.store(market, 'ticker', {'T': np.array([now]),
+											**{column: np.array([np.nan if summary.get(column) is None else summary[column]])
+												for column in ('Bid', 'Ask', 'Last', 'BaseVolume')}})
+
+			if books.get(market) is not None:
+				self.store(market, 'book', book_snapshot(books[market], self.depth, now))
+
+			trades = new_trades(histories.get(market), self.lastIds[market])
+			if len(trades['Id']):
+				recorded += self.store(market, 'trades', trades)
+				self.lastIds[market] = int(trades['Id'][-1])
+
+		return recorded
+
+
+	async def poll(self, client):
+		"""
+		Fetch and store one round of every market.
+
+		:param client: <AsyncBittrex> Client to poll with
+		:return: <int> Number of new trades recorded
+		"""
+
+		now = int(time.time() * 1000)
+
+		summaries, books, histories = await asyncio.gather(
+			client.get_market_summaries(),
+			client.get_orderbooks(self.markets, 'both'),
+			client.get_many('getmarkethistory', [{'market': market} for market in self.markets]))
+
+		return self.record(summaries['result'], books, {market: response['result'] for market, response in zip(self.markets, histories)}, now)
+
+
+	def prune(self):
+		"""
+		Delete recorded days older than keepDays
+		"""
+
+		if self.keepDays is None:
+			return
+
+		oldest = time.time() // 86400 - self.keepDays
+		for market in self.markets:
+			for day in self.days(market):
+				if day <= oldest:
+					shutil.rmtree(os.path.join(self.path, market, str(np.datetime64(day, 'D'))))
+
+
+	async def run_async(self, polls = None, client = None):
+		"""
+		Poll every interval until stopped. A poll that takes longer than the
+		interval is followed straight away by the next one.
+
+		:param polls: <int> Number of polls to make (defaults to until stopped)
+		:param client: <AsyncBittrex> Client to poll with (defaults to a new one)
+		"""
+
+		own = client is None
+		if own:
+			client = AsyncBittrex(self.secrets, concurrency = self.concurrency, rate = self.rate)
+
+		self.running = True
+		count = 0
+
+		try:
+			while self.running and (polls is None or count < polls):
+				start = time.monotonic()
+
+				try:
+					with INSTRUMENTS.span('recorder.poll'):
+						await self.poll(client)
+				except Exception as error:
+					print('recorder poll failed: {!r}'.format(error))
+
+				self.prune()
+				count += 1
+
+				if polls is not None and count >= polls:
+					break
+
+				await asyncio.sleep(max(self.interval - (time.monotonic() - start), 0))
+		finally:
+			if own:
+				await client.close()
+
+
+	def run(self, polls = None):
+		"""
+		Record until stopped (ex: with Ctrl+C)
+
+		:param polls: <int> Number of polls to make (defaults to until stopped)
+		"""
+
+		asyncio.run(self.run_async(polls))
+
+
+	def stop(self):
+		"""
+		Stop after the poll in progress
+		"""
+
+		self.running = False
+
+
+
+
+if __name__ == '__main__':
+
+	Recorder(load_secrets(), ['BTC-RVN', 'BTC-LTC', 'BTC-ETH'], keepDays = 30).run()
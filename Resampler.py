@@ -0,0 +1,244 @@
+from CandleStore import INTERVALS, COLUMNS
+import numpy as np
+
+# Seconds in each unit of a timeframe like 10s, 15m, 4h or 1d
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+
+
+def timeframe_seconds(timeframe):
+	"""
+	:param timeframe: <str> Bittrex tickInterval (ex: fiveMin), a count and unit (ex: 10s, 15m, 4h, 1d)
+					  or <int> seconds
+	:return: <int> Seconds in the timeframe
+	"""
+
+	if isinstance(timeframe, (int, np.integer)):
+		return int(timeframe)
+
+	if timeframe in INTERVALS:
+		return INTERVALS[timeframe]
+
+	return int(timeframe[:-1]) * UNITS[timeframe[-1]]
+
+
+def resample(candles, seconds, offset = 0):
+	"""
+	Aggregate candles into longer ones in one pass. Each candle goes into the
+	bar its start time falls in: open of the first, highest high, lowest low,
+	close of the last and the summed volumes.
+
+	:param candles: <dict> Column name to array sorted by T, as returned by CandleStore.read
+	:param seconds: <int> Length of each bar
+	:param offset: <int> Seconds bars are shifted from the epoch (0 lines days up with UTC midnight)
+	:return: <dict> Same columns with one value per bar, T as the time each bar starts
+	"""
+
+	times = np.asarray(candles['T'])
+
+	if len(times) == 0:
+		return {column: np.empty(0, dtype = COLUMNS[column]) for column in candles}
+
+	buckets = times - (times - offset) % seconds
+
+	# First and last candle of every bar
+	starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+	ends = np.append(starts[1:], len(times)) - 1
+
+	bars = {'T': buckets[starts]}
+	for column, values in candles.items():
+		values = np.asarray(values)
+		if column == 'O':
+			bars[column] = values[starts]
+		elif column == 'H':
+			bars[column] = np.maximum.reduceat(values, starts)
+		elif column == 'L':
+			bars[column] = np.minimum.reduceat(values, starts)
+		elif column == 'C':
+			bars[column] = values[ends]
+		elif column != 'T':
+			bars[column] = np.add.reduceat(values, starts)
+
+	return bars
+
+
+def merge_bar(bars, row, new):
+	"""
+	Fold the first bar of new into the given row of bars, both covering the same time.
+
+	:param bars: <dict> Column name to array of bars, changed in place
+	:param row: <int> Row of the bar to add to
+	:param new: <dict> Column name to array of bars whose first row is added
+	"""
+
+	for column, values in bars.items():
+		if column == 'H':
+			values[row] = max(values[row], new[column][0])
+		elif column == 'L':
+			values[row] = min(values[row], new[column][0])
+		elif column == 'C':
+			values[row] = new[column][0]
+		elif column not in ('T', 'O'):
+			values[row] += new[column][0]
+
+
+
+
+class Bars():
+	"""
+	Bars kept in column arrays with room to grow, the last of which may still
+	be open. Adding bars that start with the open one folds them into it.
+	"""
+
+	def __init__(self):
+		self.buffers = {column: np.empty(0, dtype = dtype) for column, dtype in COLUMNS.items()}
+		self.count = 0
+
+
+	def add(self, bars):
+		"""
+		Add newly aggregated bars, merging the first into the last one kept when they overlap.
+
+		:param bars: <dict> Column name to array of bars, as returned by resample
+		"""
+
+		buffers = self.buffers
+		count = self.count
+
+		if count and len(bars['T']) and bars['T'][0] == buffers['T'][count - 1]:
+			merge_bar(buffers, count - 1, bars)
+			bars = {column: values[1:] for column, values in bars.items()}
+
+		needed = count + len(bars['T'])
+		if needed > len(buffers['T']):
+			# Double the room so adding one bar at a time stays cheap
+			capacity = max(needed, 2 * len(buffers['T']), 64)
+			for column, values in buffers.items():
+				grown = np.empty(capacity, dtype = values.dtype)
+				grown[:count] = values[:count]
+				buffers[column] = grown
+
+		for column, values in bars.items():
+			buffers[column][count:needed] = values
+
+		self.count = needed
+
+
+	def last_start(self):
+		"""
+		:return: <int> Time the last bar starts, None when there are no bars
+		"""
+
+		return int(self.buffers['T'][self.count - 1]) if self.count else None
+
+
+	def view(self, partial = True):
+		"""
+		:param partial: <bool> Include the last bar
+		:return: <dict> Column name to array of bars (views, copy before changing), T as the time each bar starts
+		"""
+
+		count = self.count if partial else max(self.count - 1, 0)
+
+		return {column: values[:count] for column, values in self.buffers.items()}
+
+
+
+
+class Resampler():
+	"""
+	Builds any longer timeframe (15m, 4h, custom) of a market from the oneMin
+	candles in a CandleStore. The whole stored history is aggregated at once
+	the first time, after that each update only reads the candles added since
+	and folds them into the last, still open bar. One oneMin refresh keeps
+	every timeframe current without any other api calls.
+	"""
+
+	def __init__(self, store, market, timeframes, base = 'oneMin', offset = 0):
+		"""
+		:param store: <CandleStore> Store holding the base candles
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param timeframes: <list> Timeframes to build (ex: ['15m', 'hour', '4h'])
+		:param base: <str> tickInterval of the stored candles to build them from
+		:param offset: <int> Seconds bars are shifted from the epoch
+		"""
+
+		self.store = store
+		self.market = market
+		self.base = base
+		self.step = INTERVALS[base]
+		self.offset = offset
+		self.timeframes = {timeframe: timeframe_seconds(timeframe) for timeframe in timeframes}
+
+		for timeframe, seconds in self.timeframes.items():
+			if seconds % self.step:
+				raise ValueError('{} is not a whole number of {} candles'.format(timeframe, base))
+
+		# Base candles already aggregated and the start of the newest one
+		self.rows = 0
+		self.last = None
+
+		self.series = {timeframe: Bars() for timeframe in self.timeframes}
+
+
+	def update(self, refresh = False):
+		"""
+		Aggregate the base candles stored since the last update.
+
+		:param refresh: <bool> Bring the store up to date from Bittrex first
+		:return: <int> Number of base candles added
+		"""
+
+		if refresh:
+			self.store.refresh(self.market, self.base)
+
+		total = self.store.rows(self.market, self.base)
+		if total <= self.rows:
+			return 0
+
+		candles = {column: np.asarray(values[self.rows:total])
+					for column, values in self.store.read(self.market, self.base).items()}
+		added = total - self.rows
+		self.rows = total
+		self.last = int(candles['T'][-1])
+
+		for timeframe, seconds in self.timeframes.items():
+			self.series[timeframe].add(resample(candles, seconds, self.offset))
+
+		return added
+
+
+	def bars(self, timeframe, partial = True):
+		"""
+		:param timeframe: <str> One of the timeframes being built
+		:param partial: <bool> Include the last bar while it is still open
+		:return: <dict> Column name to array of bars (views, copy before changing), T as the time each bar starts
+		"""
+
+		return self.series[timeframe].view(partial or self.closed(timeframe))
+
+
+	def closed(self, timeframe):
+		"""
+		:return: <bool> Whether the last bar has every base candle it will get
+		"""
+
+		start = self.series[timeframe].last_start()
+
+		return start is None or self.last + self.step >= start + self.timeframes[timeframe]
+
+
+	def frame(self, timeframe, partial = True, columns = None):
+		"""
+		:param timeframe: <str> One of the timeframes being built
+		:param partial: <bool> Include the last bar while it is still open
+		:param columns: <list> Columns to include besides T (defaults to all)
+		:return: <DataFrame> Bars indexed by Time like DataGrabber.get_data
+		"""
+
+		from DataGrabber import frame_candles
+
+		bars = self.bars(timeframe, partial)
+
+		return frame_candles({column: bars[column] for column in ['T'] + (columns or [column for column in COLUMNS if column != 'T'])})
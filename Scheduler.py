@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+
+
+
+def next_boundary(interval, offset = 0, now = None):
+	"""
+	Time the next candle of the given length closes.
+
+	:param interval: <float> Candle length in seconds
+	:param offset: <float> Seconds to wait past the boundary
+	:param now: <float> Time to count from (defaults to now)
+	:return: <float> Seconds since epoch of the next boundary plus offset
+	"""
+
+	now = time.time() if now is None else now
+
+	return (now - offset) // interval * interval + interval + offset
+
+
+
+
+class Job():
+	"""
+	A function run by the Scheduler on every candle boundary.
+	"""
+
+	def __init__(self, name, function, interval, offset):
+		self.name = name
+		self.function = function
+		self.interval = interval
+		self.offset = offset
+		self.runs = 0
+		self.event = None
+
+
+
+
+class Scheduler():
+	"""
+	Runs trading loops from one asyncio event loop instead of one blocked
+	process each. Every job runs right after each candle of its interval
+	closes rather than sleeping a fixed time from whenever it last finished,
+	and can be woken early with wake(). Jobs are blocking Trader calls,
+	so they run in the default thread pool and do not hold each other up.
+	"""
+
+	def __init__(self, offset = 2, clock = time.time, speed = 1):
+		"""
+		:param offset: <float> Seconds past each boundary to wait for Bittrex to close the candle
+		:param clock: <function> Returns the current time (ex: a Simulator's replayed time)
+		:param speed: <float> How many clock seconds pass per wall clock second
+		"""
+
+		self.offset = offset
+		self.clock = clock
+		self.speed = speed
+		self.jobs = {}
+		self.running = False
+
+
+	def add(self, name, function, interval = 300, offset = None):
+		"""
+		Run a function on every boundary of the given interval.
+
+		:param name: <str> Name to refer to the job by
+		:param function: <function> Called with no arguments
+		:param interval: <float> Seconds between runs (ex: 300 for fiveMin candles)
+		:param offset: <float> Seconds past each boundary to run (defaults to the scheduler's)
+		:return: <Job> The added job
+		"""
+
+		job = Job(name, function, interval, self.offset if offset is None else offset)
+		self.jobs[name] = job
+
+		return job
+
+
+	def wake(self, name):
+		"""
+		Run a job now instead of waiting for its next boundary.
+		Safe to call from any thread.
+
+		:param name: <str> Name of the job
+		"""
+
+		job = self.jobs[name]
+
+		if job.event is not None:
+			self.loop.call_soon_threadsafe(job.event.set)
+
+
+	def stop(self):
+		"""
+		Stop every job once its current run finishes
+		"""
+
+		self.running = False
+
+		for name in self.jobs:
+			self.wake(name)
+
+
+	async def run_job(self, job):
+		"""
+		Keep running a job on its boundaries until stopped.
+
+		:param job: <Job> Job to run
+		"""
+
+		job.event = asyncio.Event()
+
+		while self.running:
+			now = self.clock()
+			delay = (next_boundary(job.interval, job.offset, now) - now) / self.speed
+
+			# Sleep until the boundary unless woken first
+			try:
+				await asyncio.wait_for(job.event.wait(), timeout = max(delay, 0))
+			except asyncio.TimeoutError:
+				pass
+			job.event.clear()
+
+			if not self.running:
+				break
+
+			# One market failing should not stop the others
+			try:
+				await self.loop.run_in_executor(None, job.function)
+			except Exception as error:
+				print(f'{job.name} failed: {error!r}')
+
+			job.runs += 1
+
+
+	async def run_async(self):
+		"""
+		Run every job until stopped
+		"""
+
+		self.loop = asyncio.get_running_loop()
+		self.running = True
+
+		await asyncio.gather(*[self.run_job(job) for job in self.jobs.values()])
+
+
+	def run(self):
+		"""
+		Run every job until stopped, blocking the caller
+		"""
+
+		asyncio.run(self.run_async())
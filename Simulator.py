@@ -0,0 +1,531 @@
+from Backtester import FEE
+from CandleStore import INTERVALS
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import urllib.parse
+import threading
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+
+
+
+def format_time(seconds):
+	"""
+	:param seconds: <int> Seconds since epoch
+	:return: <str> Time the way Bittrex writes it (ex: 2018-08-27T23:51:00)
+	"""
+
+	return str(np.datetime64(int(seconds), 's'))
+
+
+
+
+class Exchange():
+	"""
+	Replays stored candles as if they were happening now and keeps the
+	balances and orders of one account. Time runs speed times faster than
+	the wall clock from the first candle after the warmup ones.
+	Limit orders rest until the replayed prices cross them.
+
+	The order book and bid/ask come from book snapshots taken by a Recorder
+	when there are any for the market at the replayed time, otherwise they are
+	made up around the candle close. Trades recorded by a Recorder are not
+	replayed, fills only follow the candles.
+	"""
+
+	def __init__(self, candles, tickInterval, balances, speed = 1, warmup = 100, spread = .002,
+				levels = 20, slippage = .001, delay = 0, books = None):
+		"""
+		:param candles: <dict> Market to candle columns (T, O, H, L, C, V) as from CandleStore.read
+		:param tickInterval: <str> String literal time delta of the candles (ex: oneMin)
+		:param balances: <dict> Currency to starting balance
+		:param speed: <float> Replayed seconds per wall clock second
+		:param warmup: <int> Candles already closed when the replay starts
+		:param spread: <float> Gap between the synthetic bid and ask as a fraction of the price
+		:param levels: <int> Levels on each side of the synthetic order book
+		:param slippage: <float> How much worse than the bid/ask an order that crosses it fills
+		:param delay: <float> Replayed seconds before a new order reaches the book
+		:param books: <dict> Market to book snapshot columns as from Recorder.read(market, 'book')
+		"""
+
+		self.candles = {market: {column: np.asarray(values) for column, values in columns.items()}
+						for market, columns in candles.items()}
+		self.interval = INTERVALS[tickInterval]
+		self.balances = {currency: float(amount) for currency, amount in balances.items()}
+		self.reserved = {currency: 0. for currency in self.balances}
+		self.speed = speed
+		self.spread = spread
+		self.levels = levels
+		self.slippage = slippage
+		self.delay = delay
+		self.orders = {}
+		self.lock = threading.RLock()
+
+		# Recorded snapshots with their times in seconds, markets without any left out
+		self.books = {market: dict(columns, T = np.asarray(columns['T']) / 1000.)
+					for market, columns in (books or {}).items() if len(columns['T'])}
+
+		first = min(int(columns['T'][min(warmup, len(columns['T']) - 1)]) for columns in self.candles.values())
+		self.start = first + self.interval
+		self.wallStart = time.time()
+
+
+	def now(self):
+		"""
+		:return: <float> Replayed time in seconds since epoch
+		"""
+
+		return self.start + (time.time() - self.wallStart) * self.speed
+
+
+	def closed(self, market, now = None):
+		"""
+		:return: <int> Number of candles of the market that have closed by now
+		"""
+
+		now = self.now() if now is None else now
+
+		return int(np.searchsorted(self.candles[market]['T'], now - self.interval, side = 'right'))
+
+
+	def snapshot(self, market):
+		"""
+		:return: <dict> Bids and asks of the latest recorded book of the market, None if there is none by now
+		"""
+
+		books = self.books.get(market)
+		if books is None:
+			return None
+
+		row = int(np.searchsorted(books['T'], self.now(), side = 'right')) - 1
+		if row < 0:
+			return None
+
+		book = {}
+		for side, name in (('buy', 'Bid'), ('sell', 'Ask')):
+			rates = books[name + 'Rate'][row]
+			quantities = books[name + 'Quantity'][row]
+			keep = ~np.isnan(rates)
+
+			book[side] = [{'Quantity': quantity, 'Rate': rate}
+						for quantity, rate in zip(quantities[keep].astype(np.float64).tolist(), rates[keep].tolist())]
+
+		return book
+
+
+	def ticker(self, market):
+		"""
+		:return: <dict> Bid and Ask from the recorded book (or around the close of the latest candle) and Last
+		"""
+
+		candles = self.candles[market]
+		last = float(candles['C'][max(self.closed(market) - 1, 0)])
+		ticker = {'Bid': last * (1 - self.spread / 2), 'Ask': last * (1 + self.spread / 2), 'Last': last}
+
+		book = self.snapshot(market)
+		if book is not None:
+			if book['buy']:
+				ticker['Bid'] = book['buy'][0]['Rate']
+			if book['sell']:
+				ticker['Ask'] = book['sell'][0]['Rate']
+
+		return ticker
+
+
+	def orderbook(self, market, depth_type):
+		"""
+		The latest recorded book, or a synthetic one stepping away from the
+		ticker and sized from the latest candle volume when there is none.
+
+		:return: <dict> buy and sell lists of Quantity and Rate
+		"""
+
+		book = self.snapshot(market)
+		if book is not None:
+			return book if depth_type == 'both' else book[depth_type]
+
+		ticker = self.ticker(market)
+		candles = self.candles[market]
+		quantity = float(candles['V'][max(self.closed(market) - 1, 0)]) / self.levels or 1.
+		steps = np.arange(self.levels) * self.spread / 2
+
+		book = {'buy': [{'Quantity': quantity, 'Rate': rate} for rate in (ticker['Bid'] * (1 - steps)).tolist()],
+				'sell': [{'Quantity': quantity, 'Rate': rate} for rate in (ticker['Ask'] * (1 + steps)).tolist()]}
+
+		return book if depth_type == 'both' else book[depth_type]
+
+
+	def ticks(self, market):
+		"""
+		:return: <list> Every closed candle in GetTicks format
+		"""
+
+		candles = self.candles[market]
+		closed = self.closed(market)
+
+		return [{'O': o, 'H': h, 'L': l, 'C': c, 'V': v, 'BV': v * c, 'T': format_time(t)}
+				for t, o, h, l, c, v in zip(candles['T'][:closed].tolist(), candles['O'][:closed].tolist(),
+											candles['H'][:closed].tolist(), candles['L'][:closed].tolist(),
+											candles['C'][:closed].tolist(), candles['V'][:closed].tolist())]
+
+
+	def history(self, market, count = 100):
+		"""
+		One synthetic trade per closed candle, newest first.
+
+		:return: <list> Trades in getmarkethistory format
+		"""
+
+		candles = self.candles[market]
+		closed = self.closed(market)
+
+		return [{'Id': i + 1, 'TimeStamp': format_time(candles['T'][i] + self.interval), 'Quantity': float(candles['V'][i]),
+				'Price': float(candles['C'][i]), 'Total': float(candles['V'][i] * candles['C'][i]), 'FillType': 'FILL',
+				'OrderType': 'BUY' if candles['C'][i] >= candles['O'][i] else 'SELL'}
+				for i in range(closed - 1, max(closed - count, 0) - 1, -1)]
+
+
+	def available(self, currency):
+		"""
+		:return: <float> Balance not held up by open orders
+		"""
+
+		return self.balances.get(currency, 0.) - self.reserved.get(currency, 0.)
+
+
+	def place(self, market, side, quantity, rate):
+		"""
+		Place a limit order. Funds are held until it fills or is cancelled.
+
+		:param market: <str> String literal for the market (ex: BTC-LTC)
+		:param side: <str> BUY or SELL
+		:param quantity: <float> The amount to trade
+		:param rate: <float> The limit rate
+		:return: <str> uuid of the order, None with the error message when it can not be placed
+		"""
+
+		if market not in self.candles:
+			return None, 'INVALID_MARKET'
+		if quantity <= 0 or rate <= 0:
+			return None, 'QUANTITY_NOT_PROVIDED' if quantity <= 0 else 'RATE_NOT_PROVIDED'
+
+		base, secondary = market.split('-')
+		currency, amount = (base, quantity * rate * (1 + FEE)) if side == 'BUY' else (secondary, quantity)
+
+		with self.lock:
+			if self.available(currency) < amount:
+				return None, 'INSUFFICIENT_FUNDS'
+
+			self.reserved[currency] = self.reserved.get(currency, 0.) + amount
+			now = self.now()
+			order = {'OrderUuid': str(uuid.uuid4()), 'Exchange': market, 'Type': 'LIMIT_' + side,
+					'Quantity': quantity, 'QuantityRemaining': quantity, 'Limit': rate, 'Price': 0.,
+					'PricePerUnit': None, 'CommissionPaid': 0., 'Opened': format_time(now), 'Closed': None,
+					'IsOpen': True, 'CancelInitiated': False,
+					'active': now + self.delay, 'checked': now + self.delay, 'reserved': (currency, amount)}
+			self.orders[order['OrderUuid']] = order
+
+		self.match()
+
+		return order['OrderUuid'], ''
+
+
+	def fill(self, order, price, now):
+		"""
+		Fill the whole order at the given price and settle the balances.
+		"""
+
+		base, secondary = order['Exchange'].split('-')
+		quantity = order['Quantity']
+		total = quantity * price
+		commission = total * FEE
+
+		currency, amount = order['reserved']
+		self.reserved[currency] -= amount
+
+		if order['Type'] == 'LIMIT_BUY':
+			self.balances[base] = self.balances.get(base, 0.) - total - commission
+			self.balances[secondary] = self.balances.get(secondary, 0.) + quantity
+		else:
+			self.balances[secondary] = self.balances.get(secondary, 0.) - quantity
+			self.balances[base] = self.balances.get(base, 0.) + total - commission
+
+		order.update({'QuantityRemaining': 0., 'Price': total, 'PricePerUnit': price,
+					'CommissionPaid': commission, 'Closed': format_time(now), 'IsOpen': False})
+
+
+	def match(self):
+		"""
+		Fill every open order the replayed prices have reached. Orders that cross
+		the bid/ask when they reach the book fill straight away with slippage,
+		resting orders fill at their limit once a candle trades through it.
+		"""
+
+		with self.lock:
+			now = self.now()
+
+			for order in self.orders.values():
+				if not order['IsOpen'] or order['active'] > now:
+					continue
+
+				market = order['Exchange']
+				candles = self.candles[market]
+				buying = order['Type'] == 'LIMIT_BUY'
+				rate = order['Limit']
+
+				# Marketable orders take the other side of the book as soon as they arrive
+				if order['checked'] == order['active']:
+					ticker = self.ticker(market)
+					if buying and rate >= ticker['Ask']:
+						self.fill(order, min(rate, ticker['Ask'] * (1 + self.slippage)), now)
+						continue
+					if not buying and rate <= ticker['Bid']:
+						self.fill(order, max(rate, ticker['Bid'] * (1 - self.slippage)), now)
+						continue
+
+				# Otherwise look at the candles that closed since last checked
+				first = self.closed(market, order['checked'])
+				last = self.closed(market, now)
+				order['checked'] = now
+
+				if last > first:
+					if buying and candles['L'][first:last].min() <= rate:
+						self.fill(order, rate, now)
+					elif not buying and candles['H'][first:last].max() >= rate:
+						self.fill(order, rate, now)
+
+
+	def cancel(self, orderUuid):
+		"""
+		:return: <bool> Whether the order was open and is now cancelled
+		"""
+
+		with self.lock:
+			order = self.orders.get(orderUuid)
+
+			if order is None or not order['IsOpen']:
+				return False
+
+			currency, amount = order['reserved']
+			self.reserved[currency] -= amount
+			order.update({'IsOpen': False, 'CancelInitiated': True, 'Closed': format_time(self.now())})
+
+			return True
+
+
+	def public(self, order):
+		"""
+		:return: <dict> Order without the simulator's own bookkeeping
+		"""
+
+		return {key: value for key, value in order.items() if key not in ('active', 'checked', 'reserved')}
+
+
+	def handle(self, method, options):
+		"""
+		Answer one api request the way Bittrex would.
+
+		:param method: <str> Api method (ex: getticker, GetTicks)
+		:param options: <dict> Query options of the request
+		:return: <dict> success, message and result
+		"""
+
+		self.match()
+
+		market = options.get('market') or options.get('marketName')
+
+		if market is not None and market != '' and market not in self.candles and method not in ('getorderhistory', 'getopenorders'):
+			return {'success': False, 'message': 'INVALID_MARKET', 'result': None}
+
+		with self.lock:
+			if method == 'getmarkets':
+				result = [{'MarketName': name, 'BaseCurrency': name.split('-')[0], 'MarketCurrency': name.split('-')[1],
+						'MinTradeSize': 1e-8, 'IsActive': True} for name in self.candles]
+			elif method == 'getcurrencies':
+				currencies = sorted({currency for name in self.candles for currency in name.split('-')})
+				result = [{'Currency': currency, 'TxFee': 0., 'IsActive': True} for currency in currencies]
+			elif method == 'getticker':
+				result = self.ticker(market)
+			elif method == 'getmarketsummaries':
+				result = [dict(self.ticker(name), MarketName = name, TimeStamp = format_time(self.now())) for name in self.candles]
+			elif method == 'getorderbook':
+				result = self.orderbook(market, options.get('type', 'both'))
+			elif method == 'getmarkethistory':
+				result = self.history(market)
+			elif method == 'GetTicks':
+				result = self.ticks(market)
+			elif method == 'GetLatestTick':
+				result = self.ticks(market)[-1:]
+			elif method in ('buylimit', 'selllimit'):
+				orderUuid, message = self.place(market, 'BUY' if method == 'buylimit' else 'SELL',
+												float(options.get('quantity', 0)), float(options.get('rate', 0)))
+				if orderUuid is None:
+					return {'success': False, 'message': message, 'result': None}
+				result = {'uuid': orderUuid}
+			elif method == 'cancel':
+				if not self.cancel(options.get('uuid')):
+					return {'success': False, 'message': 'ORDER_NOT_OPEN', 'result': None}
+				result = None
+			elif method == 'getopenorders':
+				result = [self.public(order) for order in self.orders.values()
+						if order['IsOpen'] and (not market or order['Exchange'] == market)]
+			elif method == 'getorder':
+				order = self.orders.get(options.get('uuid'))
+				if order is None:
+					return {'success': False, 'message': 'INVALID_ORDER', 'result': None}
+				result = self.public(order)
+			elif method == 'getorderhistory':
+				result = [self.public(order) for order in reversed(list(self.orders.values()))
+						if not order['IsOpen'] and (not market or order['Exchange'] == market)]
+			elif method == 'getbalances':
+				result = [{'Currency': currency, 'Balance': balance, 'Available': self.available(currency), 'Pending': 0.}
+						for currency, balance in self.balances.items()]
+			elif method == 'getbalance':
+				currency = options.get('currency')
+				result = {'Currency': currency, 'Balance': self.balances.get(currency, 0.),
+						'Available': self.available(currency), 'Pending': 0.}
+			else:
+				return {'success': False, 'message': 'NOT_SUPPORTED', 'result': None}
+
+		return {'success': True, 'message': '', 'result': result}
+
+
+
+
+class Simulator():
+	"""
+	In-process stand-in for the Bittrex api. Serves the public, market, account
+	and GetTicks endpoints Bittrex.api_request uses from an Exchange replaying
+	stored candles, so the whole Trader pipeline can run offline:
+
+		simulator = Simulator.from_store(store, ['BTC-LTC'], 'oneMin', {'BTC': 1}, speed = 60).start()
+		trader = Trader(secrets, 'BTC-LTC', bittrex = Bittrex(secrets, api_url = simulator.url))
+	"""
+
+	def __init__(self, exchange, latency = 0, secret = None, port = 0):
+		"""
+		:param exchange: <Exchange> Replayed market and account
+		:param latency: <float> Wall clock seconds to wait before answering each request
+		:param secret: <str> Api secret to check the apisign header against (defaults to not checking)
+		:param port: <int> Port to listen on (defaults to any free one)
+		"""
+
+		self.exchange = exchange
+		self.latency = latency
+		self.secret = secret
+		self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+		self.url = 'http://127.0.0.1:%d' % self.server.server_port
+		self.thread = None
+
+
+	@classmethod
+	def from_store(cls, store, markets, tickInterval, balances, latency = 0, secret = None, port = 0,
+				recorder = None, **options):
+		"""
+		Replay candles from a CandleStore, and the book snapshots of a Recorder when given one.
+
+		:param store: <CandleStore> Store to read the candles from
+		:param markets: <list> Markets to replay
+		:param tickInterval: <str> String literal time delta (ex: oneMin)
+		:param balances: <dict> Currency to starting balance
+		:param latency: <float> Wall clock seconds to wait before answering each request
+		:param secret: <str> Api secret to check the apisign header against (defaults to not checking)
+		:param port: <int> Port to listen on (defaults to any free one)
+		:param recorder: <Recorder> Recordings to replay the order books of
+		:param options: Passed on to Exchange (speed, warmup, spread, levels, slippage, delay)
+		:return: <Simulator>
+		"""
+
+		candles = {market: store.read(market, tickInterval) for market in markets}
+		books = None if recorder is None else {market: recorder.read(market, 'book') for market in markets}
+
+		return cls(Exchange(candles, tickInterval, balances, books = books, **options), latency, secret, port)
+
+
+	def handler(self):
+		"""
+		:return: <class> Request handler bound to this simulator
+		"""
+
+		simulator = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			# Headers and body go out as separate writes, without this delayed acks hold each response ~40ms
+			disable_nagle_algorithm = True
+
+			def do_GET(self):
+				parsed = urllib.parse.urlparse(self.path)
+				method = parsed.path.rstrip('/').split('/')[-1]
+				options = {key: values[-1] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+
+				if simulator.latency:
+					time.sleep(simulator.latency)
+
+				if simulator.secret is not None and not simulator.signed(self):
+					response = {'success': False, 'message': 'INVALID_SIGNATURE', 'result': None}
+				else:
+					response = simulator.exchange.handle(method, options)
+
+				body = json.dumps(response).encode()
+				self.send_response(200)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		return Handler
+
+
+	def signed(self, request):
+		"""
+		Like Bittrex only market and account requests are checked.
+
+		:return: <bool> Whether the apisign header matches the requested url
+		"""
+
+		path = urllib.parse.urlparse(request.path).path
+		if '/market/' not in path and '/account/' not in path:
+			return True
+
+		url = self.url + request.path
+		urls = [url]
+
+		# The url was signed with the ? that requests drops when there are no options
+		if '?' not in request.path:
+			urls.append(url + '?')
+
+		given = request.headers.get('apisign', '')
+
+		return any(hmac.compare_digest(hmac.new(self.secret.encode(), url.encode(), hashlib.sha512).hexdigest(), given)
+					for url in urls)
+
+
+	def start(self):
+		"""
+		Serve requests on a background thread.
+
+		:return: <Simulator> Itself
+		"""
+
+		self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+		self.thread.start()
+
+		return self
+
+
+	def stop(self):
+		"""
+		Stop serving requests
+		"""
+
+		self.server.shutdown()
+		self.server.server_close()
@@ -0,0 +1,109 @@
+from Backtester import BUY, SELL, crossover_signal
+from Indicators import sma, ema, bollinger, rsi
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+
+
+class Strategy(ABC):
+	"""
+	A trading strategy for the BatchRunner and Tester. signal() turns prices into
+	BUY, SELL or 0 for each row. It must only read the prices (they are shared
+	between strategies and read-only) and must only look back, never ahead.
+	A strategy that doesn't implement signal() can't be created.
+	"""
+
+	@abstractmethod
+	def signal(self, prices):
+		"""
+		:param prices: <ndarray> Price for each row
+		:return: <ndarray> BUY, SELL or 0 for each row
+		"""
+
+	def __repr__(self):
+		return '{}({})'.format(type(self).__name__, ', '.join(str(value) for value in vars(self).values()))
+
+
+
+
+class TrailingAverage(Strategy):
+	"""
+	Simple Trailing (T) Average Strategy
+	When the current value is greater than the T average, sell.
+	When the current value is less than the T average, buy.
+	"""
+
+	def __init__(self, num):
+		"""
+		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
+		"""
+
+		self.num = num
+
+	def signal(self, prices):
+		return crossover_signal(prices, sma(prices, self.num))
+
+
+
+
+class ExponentialAverage(Strategy):
+	"""
+	Trailing average strategy against an exponential moving average.
+	"""
+
+	def __init__(self, num):
+		"""
+		:param num: <int> Window of the average
+		"""
+
+		self.num = num
+
+	def signal(self, prices):
+		return crossover_signal(prices, ema(prices, self.num))
+
+
+
+
+class BollingerBands(Strategy):
+	"""
+	Buy when the price drops below the lower band, sell when it rises above the upper band.
+	"""
+
+	def __init__(self, num, width = 2):
+		"""
+		:param num: <int> Window of the bands
+		:param width: <float> Standard deviations between the middle and each band
+		"""
+
+		self.num = num
+		self.width = width
+
+	def signal(self, prices):
+		middle, upper, lower = bollinger(prices, self.num, self.width)
+
+		return np.where(prices < lower, BUY, np.where(prices > upper, SELL, 0)).astype(np.int8)
+
+
+
+
+class RelativeStrength(Strategy):
+	"""
+	Buy when the RSI is oversold, sell when it is overbought.
+	"""
+
+	def __init__(self, num = 14, low = 30, high = 70):
+		"""
+		:param num: <int> Window of the RSI
+		:param low: <float> RSI to buy below
+		:param high: <float> RSI to sell above
+		"""
+
+		self.num = num
+		self.low = low
+		self.high = high
+
+	def signal(self, prices):
+		values = rsi(prices, self.num)
+
+		return np.where(values < self.low, BUY, np.where(values > self.high, SELL, 0)).astype(np.int8)
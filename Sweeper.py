@@ -0,0 +1,168 @@
+from Bittrex import Bittrex
+from Backtester import Backtester, crossover_signal, window_metrics
+from DataGrabber import NAMES, fetch_candles
+from Indicators import sma
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import json
+import os
+
+PRICE_TYPES = ['O', 'H', 'L', 'C']
+
+# Candle prices for the worker processes, filled in by attach_candles
+_shared = {}
+
+
+
+
+def load_candles(secrets, markets, timeInterval):
+	"""
+	Grab the historical candles of several markets with every price type.
+
+	:param secrets: <dict> Bittrex api secrets
+	:param markets: <list> String literals for the markets (ex: BTC-LTC)
+	:param timeInterval: <str> String literal time delta (ex: oneMin, fiveMin, thirtyMin, day)
+	:return: <dict> Market name to DataFrame of Open, High, Low and Close columns
+	"""
+
+	bittrex = Bittrex(secrets)
+
+	return {market: fetch_candles(bittrex, market, timeInterval, PRICE_TYPES) for market in markets}
+
+
+def attach_candles(name, shape, layout):
+	"""
+	Process pool initializer. Maps the shared block of candle prices into the worker
+	once so tasks only have to send their market, price type and windows.
+
+	:param name: <str> Name of the shared memory block
+	:param shape: <tuple> Shape of the packed price array
+	:param layout: <dict> (market, priceType) to (start, length) in the packed array
+	"""
+
+	block = shared_memory.SharedMemory(name = name)
+	_shared['block'] = block
+	_shared['prices'] = np.ndarray(shape, dtype = np.float64, buffer = block.buf)
+	_shared['layout'] = layout
+
+
+def backtest_windows(market, priceType, windows, startingAmount):
+	"""
+	Process pool task. Backtest every window of one market and price type
+	against the prices in shared memory.
+
+	:param market: <str> String literal for the market (ex: BTC-LTC)
+	:param priceType: <str> O, H, L or C
+	:param windows: <list> Trailing average windows to test
+	:param startingAmount: <float> Wallet to start each backtest with
+	:return: <list> One dict of results per window
+	"""
+
+	start, length = _shared['layout'][(market, priceType)]
+	prices = _shared['prices'][start:start + length]
+	tester = Backtester(np.arange(length), prices, startingAmount)
+
+	results = []
+	for num in windows:
+		# Arrays only, the ledger and equity frames of Backtester.run are never looked at here
+		result = tester.simulate(crossover_signal(prices, sma(prices, num)))
+		metrics = window_metrics(result['equity'], len(result['rows']))
+
+		results.append({'Market': market,
+						'PriceType': priceType,
+						'Window': num,
+						'Final': result['final'],
+						'Return': result['final'] / startingAmount - 1,
+						'Trades': int(metrics['trades']),
+						'Drawdown': float(metrics['drawdown'])})
+
+	return results
+
+
+
+
+class Sweeper():
+	"""
+	Runs the trailing average backtest over a grid of windows, markets and
+	price types on a process pool. The candle prices are packed into one
+	shared memory block so they are not pickled for every task.
+	"""
+
+	def __init__(self, candles, startingAmount):
+		"""
+		:param candles: <dict> Market name to DataFrame with Open, High, Low and Close columns
+		:param startingAmount: <float> Wallet to start each backtest with
+		"""
+
+		self.candles = candles
+		self.wallet = startingAmount
+
+
+	def run(self, windows, markets = None, priceTypes = PRICE_TYPES, maxWorkers = None):
+		"""
+		Backtest every combination of window, market and price type.
+
+		:param windows: <list> Trailing average windows to test
+		:param markets: <list> Markets to test (defaults to every market in candles)
+		:param priceTypes: <list> Price types to test (O, H, L, C)
+		:param maxWorkers: <int> Number of processes (defaults to every core)
+		:return: <DataFrame> One row per combination, best final value first
+		"""
+
+		markets = list(self.candles) if markets is None else markets
+		maxWorkers = maxWorkers or os.cpu_count()
+
+		# Pack every series end to end and remember where each one starts
+		layout = {}
+		start = 0
+		for market in markets:
+			for priceType in priceTypes:
+				length = len(self.candles[market])
+				layout[(market, priceType)] = (start, length)
+				start += length
+
+		block = shared_memory.SharedMemory(create = True, size = max(start, 1) * 8)
+
+		try:
+			prices = np.ndarray((start,), dtype = np.float64, buffer = block.buf)
+			for (market, priceType), (offset, length) in layout.items():
+				prices[offset:offset + length] = self.candles[market][NAMES[priceType]].values
+
+			# Split the windows so there are a few tasks per worker to keep every core busy
+			chunks = max(1, -(-maxWorkers * 4 // len(layout))) if layout else 1
+			windows = list(windows)
+			size = max(1, -(-len(windows) // chunks))
+
+			with ProcessPoolExecutor(max_workers = maxWorkers, initializer = attach_candles,
+									initargs = (block.name, (start,), layout)) as pool:
+				futures = [pool.submit(backtest_windows, market, priceType, windows[i:i + size], self.wallet)
+							for market, priceType in layout
+							for i in range(0, len(windows), size)]
+
+				rows = [row for future in futures for row in future.result()]
+
+			del prices
+		finally:
+			block.close()
+			block.unlink()
+
+		results = pd.DataFrame(rows, columns = ['Market', 'PriceType', 'Window', 'Final', 'Return', 'Trades', 'Drawdown'])
+		results = results.sort_values('Final', ascending = False, kind = 'stable').reset_index(drop = True)
+		results.index.name = 'Rank'
+
+		return results
+
+
+
+
+if __name__ == '__main__':
+
+	with open('./database/secrets.json') as file:
+		secrets = json.load(file)
+		file.close()
+
+	candles = load_candles(secrets, ['BTC-RVN', 'BTC-LTC'], 'fiveMin')
+
+	print(Sweeper(candles, .08).run(range(2, 50)))
@@ -1,5 +1,7 @@
 from Bittrex import Bittrex
 from DataGrabber import DataGrabber
+from Backtester import Backtester
+from Strategies import TrailingAverage
 import pandas as pd
 import json
 
@@ -7,67 +9,48 @@ import json
 class Tester():
 	"""
 	Class that simulates historical backtesting trading.
-	Imports data from Data Grabber and will store different
-	trading strategies as methods.
+	Imports data from Data Grabber and runs Strategies over it.
+	Use Backtester.BatchRunner to compare many strategies at once.
 	"""
 
 	def __init__(self, histData, startingAmount):
 		self.histData = histData
 		self.wallet = startingAmount
+		self.ledger = None
+		self.equity = None
 
 
-	def trailingAverage(self, num):
+	def run(self, strategy):
 		"""
-		Simple Trailing (T) Average Strategy
-		When the current value is greater than the T average, sell.
-		When the current value is less than the T average, buy
+		Backtest any Strategy over the data without changing it.
 
-		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
-		:return: <int> Coins gained... (This should probably be changed to a better value. There will be issues with price flucations of BTC compared to other coin)
+		:param strategy: <Strategy> Strategy to run
+		:return: <float> Value of wallet and coins at the last price
 		"""
 
 		df = self.histData
-		wallet = self.wallet
-		holding = False
-		coinCount = 0
-
-		# Create moving average column
-		df['MA'] = df.iloc[:,1].rolling(window = num).mean()
-
-		# Loop through rows
-		for index, row in df.iterrows():
-			currentTime = row.iloc[0]
-			currentVal = row.iloc[1]
-			currentAvg = row.iloc[2]
-
-			# If current price is greater than average and holding SELL
-			if currentVal > currentAvg and holding:
-				wallet += (currentVal * coinCount * .9975)
-				coinCount = 0
-				holding = not holding
-				print(f'S on {currentTime} ', end = '')
 
-			# If current price is less than average and not holding BUY
-			elif currentVal < currentAvg and not holding:
-				numCoins = wallet / (currentVal * 1.0025)
-				wallet -= (numCoins * currentVal)
-				coinCount = numCoins
-				holding = not holding
-				print(f'B on {currentTime} ', end = '')
+		# Run the whole thing through the batched engine
+		result = Backtester(df.index.values, df.iloc[:,0].values, self.wallet).run_signal(strategy.signal(df.iloc[:,0].values))
 
-			else:
-				print(f'N on {currentTime} ', end = '')
+		# Hold onto the trades and wallet value over time for looking at later
+		self.ledger = result['ledger']
+		self.equity = result['equity']
 
-			print(format(currentVal, '.8f'), end = '')
-			# print(round(currentVal, 8), end = '')
-			print(f' Wallet: {round(wallet,8)} coinCount: {round(coinCount,8)}')
+		return result['final']
 
 
-		# When done calculate number of coins finished with
-		finalVal = wallet + (coinCount * currentVal)
+	def trailingAverage(self, num):
+		"""
+		Simple Trailing (T) Average Strategy
+		When the current value is greater than the T average, sell.
+		When the current value is less than the T average, buy
 
+		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
+		:return: <int> Coins gained... (This should probably be changed to a better value. There will be issues with price flucations of BTC compared to other coin)
+		"""
 
-		return finalVal
+		return self.run(TrailingAverage(num))
 
 
 
@@ -80,7 +63,7 @@ if __name__ == '__main__':
 		secrets = json.load(file)
 		file.close()
 
-	data = DataGrabber(secrets, 'BTC-RVN', 'fiveMin', 'O').get_data()
+	data = DataGrabber(secrets, 'BTC-RVN', 'fiveMin', 'O', './database/candles').get_data()
 
 	data = data.drop(data.index[0])
 
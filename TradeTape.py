@@ -0,0 +1,49 @@
+import numpy as np
+
+# Trades as kept from the getmarkethistory tape, T in milliseconds since epoch (trades come with fractions of a second)
+TRADE_COLUMNS = {'T': np.int64, 'Id': np.int64, 'Price': np.float64, 'Quantity': np.float64, 'Side': np.int8}
+
+# Side of a trade, same as Backtester
+TRADE_BUY = 1
+TRADE_SELL = -1
+
+
+
+
+def parse_times(stamps):
+	"""
+	:param stamps: <list> Bittrex time strings (ex: '2018-08-27T23:51:00.37')
+	:return: <ndarray> Milliseconds since epoch
+	"""
+
+	return np.array(stamps, dtype = 'datetime64[ms]').astype(np.int64)
+
+
+def new_trades(trades, lastId = None):
+	"""
+	Pull the trades not seen yet out of a getmarkethistory page. Pages overlap
+	and come newest first, so only trades with an Id past the last one seen
+	are kept, each once, oldest first.
+
+	:param trades: <list> Trade dicts from getmarkethistory
+	:param lastId: <int> Id of the newest trade already seen
+	:return: <dict> Column name to array of the new trades (see TRADE_COLUMNS)
+	"""
+
+	trades = trades or []
+	ids = np.fromiter((trade['Id'] for trade in trades), dtype = np.int64, count = len(trades))
+
+	# First index of each Id in increasing order
+	ids, rows = np.unique(ids, return_index = True)
+	if lastId is not None:
+		keep = ids > lastId
+		ids, rows = ids[keep], rows[keep]
+
+	trades = [trades[row] for row in rows.tolist()]
+
+	return {'T': parse_times([trade['TimeStamp'] for trade in trades]),
+			'Id': ids,
+			'Price': np.fromiter((trade['Price'] for trade in trades), dtype = np.float64, count = len(trades)),
+			'Quantity': np.fromiter((trade['Quantity'] for trade in trades), dtype = np.float64, count = len(trades)),
+			'Side': np.fromiter((TRADE_BUY if trade['OrderType'] == 'BUY' else TRADE_SELL for trade in trades),
+								dtype = np.int8, count = len(trades))}
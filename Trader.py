@@ -1,9 +1,17 @@
 from Bittrex import Bittrex
-from DataGrabber import DataGrabber
-import pandas as pd
+from DataGrabber import DataGrabber, fetch_candles
+from CandleStore import INTERVALS
+from Scheduler import Scheduler
+from Indicators import SMA
+from OrderBook import OrderBook
+from ExecutionPlanner import ExecutionPlanner
+from Dispatcher import Dispatcher
+from MarketInfo import MarketInfo
+from Ledger import Ledger
+from Instrumentation import INSTRUMENTS
+from EventLog import EventLog, NULL_LOG
 import json
 import time
-import datetime
 
 class Trader():
 	"""
@@ -12,10 +20,82 @@ class Trader():
 	All methods used in here need to be backtested with the Tester Class.
 	"""
 
-	def __init__(self, secrets, market):
-		self.Bittrex = Bittrex(secrets)
+	def __init__(self, secrets, market, ttl = 5, bittrex = None, events = None, info = None, ledger = None):
+		self.Bittrex = Bittrex(secrets) if bittrex is None else bittrex
 		self.market = market
+		self.events = NULL_LOG if events is None else events
+		self.info = MarketInfo(self.Bittrex) if info is None else info
+		self.ledger = Ledger(self.Bittrex, events = self.events) if ledger is None else ledger
 		self.base, self.secondary = market.split('-')
+		self.book = OrderBook(market)
+		self.dispatcher = Dispatcher(self.Bittrex, info = self.info, ledger = self.ledger, events = self.events)
+		self.planner = ExecutionPlanner(self)
+		self.moving_average = None
+
+		# Name to (time fetched, value) of Bittrex results that can be reused for ttl seconds
+		self.ttl = ttl
+		self.cache = {}
+
+	def cached(self, name, fetch):
+		"""
+		Return a cached Bittrex result, fetching it again once it is older than ttl.
+
+		:param name: <str> Name the result is cached under
+		:param fetch: <function> Gets the result from Bittrex
+		:return: Cached result
+		"""
+
+		now = time.monotonic()
+		entry = self.cache.get(name)
+
+		if entry is None or now - entry[0] > self.ttl:
+			with INSTRUMENTS.span('trader.' + name):
+				entry = (now, fetch())
+			self.cache[name] = entry
+
+		return entry[1]
+
+	def invalidate(self, name = None):
+		"""
+		Throw away cached results so the next read fetches them again.
+		Called after placing an order since it moves the market.
+
+		:param name: <str> Name of the result to throw away (defaults to all)
+		"""
+
+		if name is None:
+			self.cache.clear()
+		else:
+			self.cache.pop(name, None)
+
+	def snapshot(self, ticker = None):
+		"""
+		Fetch the ticker once for this tick. Bid, ask and last are then all read
+		from the same view of the market until the cache expires or an order is
+		placed. Balances come from the ledger, which is reconciled when due.
+
+		:param ticker: <dict> Bid, Ask and Last already fetched elsewhere (ex: from getmarketsummaries)
+		:return: <dict> ticker: <dict> Bid, Ask and Last, balances: <dict> Available balances
+		"""
+
+		self.invalidate()
+
+		if ticker is not None:
+			self.cache['ticker'] = (time.monotonic(), ticker)
+
+		with INSTRUMENTS.span('trader.ledger'):
+			self.ledger.refresh()
+
+		return {'ticker': self.get_ticker(), 'balances': self.get_balances()}
+
+	def get_ticker(self):
+		"""
+		Get the current Bid, Ask and Last values for the given market.
+
+		:return: <dict> Current tick values
+		"""
+
+		return self.cached('ticker', lambda: self.Bittrex.get_ticker(self.market)['result'])
 
 	def get_current_bid(self):
 		"""
@@ -25,7 +105,7 @@ class Trader():
 		:return: <float> Largest Bid Value
 		"""
 
-		return self.Bittrex.get_ticker(self.market)['result']['Bid']
+		return self.get_ticker()['Bid']
 
 	def get_current_ask(self):
 		"""
@@ -35,7 +115,7 @@ class Trader():
 		:return: <float> Smallest Ask Value
 		"""
 
-		return self.Bittrex.get_ticker(self.market)['result']['Ask']
+		return self.get_ticker()['Ask']
 
 	def get_last_trade(self):
 		"""
@@ -45,31 +125,18 @@ class Trader():
 		:return: <float> Last Transaction Price
 		"""
 
-		return self.Bittrex.get_ticker(self.market)['result']['Last']
+		return self.get_ticker()['Last']
 
-	def get_order_book(self, book_type = None):
+	def get_order_book(self):
 		"""
-		Get order book for current Bids for the given market.
+		Get order book of current bids and asks for the given market
+		with one request for both sides.
 
-		:param book_type: <str> Which types of orders to return
-		:return: <DataFrame> DataFrame of current bids
+		:return: <OrderBook> Bids and asks as sorted arrays
 		"""
 
-		buy_book = self.Bittrex.get_orderbook(self.market, 'buy')['result']
-		buy_book = pd.DataFrame(buy_book)
-		buy_book['type'] = 'buy'
-
-		sell_book = self.Bittrex.get_orderbook(self.market, 'sell')['result']
-		sell_book = pd.DataFrame(sell_book)
-		sell_book['type'] = 'sell'
-
-		order_book = buy_book.append(sell_book, ignore_index = True)
-
-		# Check to see if a specific book is requested
-		if book_type is None:
-			return order_book
-		else:
-			return order_book.loc[order_book['type'] == book_type].reset_index(drop = True)
+		with INSTRUMENTS.span('trader.orderbook'):
+			return self.book.update(self.Bittrex.get_orderbook(self.market, 'both')['result'])
 
 	def place_buy(self, quantity, price):
 		"""
@@ -80,7 +147,13 @@ class Trader():
 		:return: <dict> Confirmation
 		"""
 
-		return self.Bittrex.buy_limit(self.market, quantity, price)
+		# Checked, logged and held in the ledger like every other order
+		result = self.dispatcher.place_order(self.market, 'buy', quantity, price)
+
+		# Prices have changed
+		self.invalidate()
+
+		return result
 
 	def place_sell(self, quantity, price):
 		"""
@@ -91,112 +164,139 @@ class Trader():
 		:return: <dict> Confirmation
 		"""
 
-		return self.Bittrex.sell_limit(self.market, quantity, price)
+		# Checked, logged and held in the ledger like every other order
+		result = self.dispatcher.place_order(self.market, 'sell', quantity, price)
+
+		# Prices have changed
+		self.invalidate()
+
+		return result
 
 	def get_balances(self):
 		"""
-		Get list of available balances for all coins you own
+		Get list of available balances for all coins you own,
+		from the ledger instead of asking Bittrex every time
 
 		:return: <dict> Available balances
 		"""
 
-		df = bit.get_balances()['result']
-
-		result = {d['Currency']:d['Available'] for d in df}
-
-		return result
+		return self.ledger.balances()
 
 
 
 
-	def trailing_average(self, num):
+	def warmup(self, num, timeInterval = 'fiveMin'):
 		"""
-		Simple Trailing (T) Average Strategy
-		When the current value is greater than the T average, sell.
-		When the current value is less than the T average, buy.
-		Start with all coins in BTC, ie holding = False
+		Build up the moving average straight away from the latest historical
+		candles instead of sampling the last trade for num intervals.
 
 		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
-		:return: <int> Coins gained... (This should probably be changed to a better value. There will be issues with price flucations of BTC compared to other coin)
+		:param timeInterval: <str> String literal time delta of each data point (ex: fiveMin)
+		:return: <SMA> The warmed up moving average
 		"""
 
-		# Start assuming holding neither (I do recognize you have to holding one)
-		holdingBase = holdingSecondary = False
-		moving_average = []
+		closes = fetch_candles(self.Bittrex, self.market, timeInterval, ['C'])['Close'].values
 
-		# Build up the moving average here before moving onto the loop
-		while len(moving_average) < num:
-			moving_average.append(self.get_last_trade())
-			time.sleep(300)
+		self.moving_average = SMA(num)
+		for close in closes[-num:].tolist():
+			self.moving_average.update(close)
 
-		while True:
+		return self.moving_average
 
-			# Get current Bid, Ask and Last Transaction
+	def tick(self):
+		"""
+		One step of the Simple Trailing (T) Average Strategy.
+		Needs warmup to have been called first. Each stage is timed
+		into INSTRUMENTS when it is turned on.
+		"""
+
+		# Time the whole step as well as each stage
+		with INSTRUMENTS.span('trader.tick'):
+			# Get current Bid, Ask, Last Transaction and balances in one go
+			self.snapshot()
 			current_bid = self.get_current_bid()
 			current_ask = self.get_current_ask()
 			last_trade = self.get_last_trade()
 
-
-
-			# Pop oldest value add current and calculate current moving average
-			moving_average = moving_average[1:].append(last_trade)
-			current_average = sum(moving_average) / num
-
-
-
-
+			# Drop oldest value add current and calculate current moving average
+			with INSTRUMENTS.span('trader.indicator'):
+				current_average = self.moving_average.update(last_trade)
 
 			# Determine if holding any Secondary
-			secondaryBalance = self.get_balances()[self.secondary]
+			secondaryBalance = self.ledger.available(self.secondary)
 
 			# If current bid is greater than average and holding Secondary - SELL
 			if current_bid > current_average and secondaryBalance > 0:
-				print('SELL')
+				self.events.decision(self.market, 'sell', bid = current_bid, ask = current_ask, last = last_trade, average = current_average)
+				self.sell(current_average)
+
+			# Determine if holding any of Base
+			baseBalance = self.ledger.available(self.base)
 
-				# Get Current bid orders larger than average
-				buyOptions = self.get_order_book('buy')
-				buyOptions = buyOptions.loc[buyOptions['Rate'] >= current_average]
+			# If current ask is less than average and holding Base - BUY
+			if current_ask < current_average and baseBalance > 0:
+				self.events.decision(self.market, 'buy', bid = current_bid, ask = current_ask, last = last_trade, average = current_average)
+				self.buy(current_average)
 
-				# Loop through each bid order and calculate how much to sell of each
-				while secondaryBalance > 0:
-					topOrder = buyOptions.head(1)
-					sellAmount = max(secondaryBalance, topOrder.iloc[0]['Quantity'])
-					sellRate = topOrder.iloc[0]['Rate']
+	def sell(self, current_average):
+		"""
+		Sell all of the Secondary into the bids above the average.
+		The child orders are planned from one book snapshot and placed together.
 
-					# Make the sell
-					self.place_sell(sellAmount, sellRate)
+		:param current_average: <float> Lowest rate to sell at
+		:return: <dict> Result of ExecutionPlanner.execute
+		"""
 
-					# Recalculate secondaryBalance
-					secondaryBalance = self.get_balances()[self.secondary]
+		print('SELL')
 
-					# Drop top order from buy book
-					buyOptions = buyOptions[1:]
+		secondaryBalance = self.ledger.available(self.secondary)
 
+		# Sell into each bid larger than average, no more than it holds
+		return self.planner.execute('sell', secondaryBalance, current_average)
 
+	def buy(self, current_average):
+		"""
+		Buy Secondary with all of the Base from the asks below the average.
 
-				# Log transactions made
+		:param current_average: <float> Highest rate to buy at
+		"""
 
+		print('BUY')
 
+		# Get amount of Base holding
+		baseBalance = self.ledger.available(self.base)
 
+		# Get current Asks smaller than average
 
-			# Determine if holding any of Base
-			baseBalance = self.get_balances()[self.base]
+		# Loop through each ask and calculate how much to purchase of each
 
-			# If current ask is less than average and holding Base - BUY
-			if current_ask < current_average and baseBalance > 0:
-				print('BUY')
+		# Log transactions
 
-				# Get amount of Base holding
-				baseBalance
+	def trailing_average(self, num, timeInterval = 'fiveMin', scheduler = None):
+		"""
+		Simple Trailing (T) Average Strategy
+		When the current value is greater than the T average, sell.
+		When the current value is less than the T average, buy.
+		Start with all coins in BTC, ie holding = False
 
-				# Get current Asks smaller than average
+		Ticks right after each candle closes. When given a scheduler the tick is
+		only added to it, so many markets and strategies can share one event loop.
 
-				# Loop through each ask and calculate how much to purchase of each
+		:param num: <int> The number of data points to use in the T value. Ie, 12 = Trailing 12
+		:param timeInterval: <str> String literal time delta between ticks (ex: fiveMin)
+		:param scheduler: <Scheduler> Scheduler to add the tick to (defaults to running one here)
+		:return: <int> Coins gained... (This should probably be changed to a better value. There will be issues with price flucations of BTC compared to other coin)
+		"""
+
+		# Build up the moving average here before moving onto the loop
+		self.warmup(num, timeInterval)
 
-				# Log transactions
+		if scheduler is not None:
+			return scheduler.add(self.market, self.tick, INTERVALS[timeInterval])
 
-			# sleep for 5 minutes
-			time.sleep(300)
+		scheduler = Scheduler()
+		scheduler.add(self.market, self.tick, INTERVALS[timeInterval])
+		scheduler.run()
 
 
 
@@ -238,17 +338,13 @@ if __name__ == '__main__':
 
 	# print(test.get_balances()[test.secondary] > 0)
 
-	buyOptions = test.get_order_book('buy')
-	buyOptions = buyOptions.loc[buyOptions['Rate'] >= .00000285]
-	print(buyOptions)
+	book = test.get_order_book()
+	print(book.to_frame('buy').iloc[:book.count('buy', .00000285)])
 	# print(format(max(buyOptions['Rate']), '.8f'))
 	print(format(test.get_current_bid(), '.8f'))
 
-	logFile = datetime.datetime.now().strftime("%d%b%Y%H%m") + 'TrailingAverage'
-	logLocation = './log/' + logFile + '.txt'
-	log = open(logLocation, 'w')
-	log.write('Test 3\n')
-	log.write('Test 2\n')
-	log.close()
+	with EventLog('TrailingAverage') as log:
+		log.decision('BTC-RVN', 'none', bid = bid, ask = ask, last = last)
+		log.balances(test.get_balances())
 
 	
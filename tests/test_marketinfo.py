@@ -0,0 +1,73 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MarketInfo import MarketInfo, round_down
+import math
+
+
+
+
+MARKETS = [{'MarketName': 'BTC-LTC', 'BaseCurrency': 'BTC', 'MarketCurrency': 'LTC', 'MinTradeSize': .01, 'IsActive': True}]
+CURRENCIES = [{'Currency': 'BTC', 'IsActive': True}, {'Currency': 'LTC', 'IsActive': True}]
+
+
+class FlakyBittrex():
+	"""
+	Answers getmarkets with an error the first failures times
+	"""
+
+	def __init__(self, failures = 1):
+		self.failures = failures
+		self.calls = 0
+
+	def get_markets(self):
+		self.calls += 1
+		if self.calls <= self.failures:
+			return {'success': False, 'message': 'APIKEY_INVALID', 'result': None}
+		return {'success': True, 'message': '', 'result': MARKETS}
+
+	def get_currencies(self):
+		return {'success': True, 'message': '', 'result': CURRENCIES}
+
+
+
+
+def test_failed_fetch_is_not_cached():
+	bittrex = FlakyBittrex()
+	info = MarketInfo(bittrex)
+
+	# Nothing known yet, the order is left to Bittrex instead of rejected as INVALID_MARKET
+	quantity, rate, error = info.validate('BTC-LTC', 1.5, .01)
+	assert error is None
+	assert info.fetched is None
+
+	# The next call fetches again and gets the metadata
+	assert info.validate('BTC-LTC', .001, .01)[2]['message'] == 'MIN_TRADE_REQUIREMENT_NOT_MET'
+	assert info.validate('BTC-NOPE', 1.5, .01)[2]['message'] == 'INVALID_MARKET'
+	assert bittrex.calls == 2
+
+
+def test_failed_refresh_keeps_previous_metadata():
+	bittrex = FlakyBittrex(failures = 0)
+	info = MarketInfo(bittrex, ttl = 0)
+	info.refresh()
+
+	bittrex.failures = bittrex.calls + 1
+	assert not info.refresh()
+	assert info.get('BTC-LTC') is not None
+
+
+def test_non_finite_orders_are_rejected():
+	info = MarketInfo(FlakyBittrex(failures = 0))
+
+	assert info.validate('BTC-LTC', float('nan'), .01)[2]['message'] == 'INVALID_QUANTITY'
+	assert info.validate('BTC-LTC', float('inf'), .01)[2]['message'] == 'INVALID_QUANTITY'
+	assert info.validate('BTC-LTC', 1.5, float('nan'))[2]['message'] == 'INVALID_RATE'
+
+
+def test_round_down_never_rounds_up():
+	assert round_down(0.1234567899999) == 0.12345678
+	assert round_down(0.29) == 0.29
+	assert round_down(1e25) == 1e25
+	assert math.isnan(round_down(float('nan')))
@@ -0,0 +1,82 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Bittrex import Bittrex
+from Dispatcher import Dispatcher
+from Simulator import Simulator, Exchange
+from Portfolio import Portfolio
+from Trader import Trader
+import numpy as np
+import pytest
+
+SECRETS = {'bittrex': {'api_key': 'key', 'api_secret': 'secret'}}
+
+
+
+
+@pytest.fixture
+def simulator():
+	count = 300
+	times = 1500000000 + 60 * np.arange(count)
+	closes = np.full(count, 1e-3)
+	candles = {'BTC-LTC': {'T': times, 'O': closes, 'H': closes, 'L': closes, 'C': closes, 'V': np.full(count, 100.)}}
+
+	simulator = Simulator(Exchange(candles, 'oneMin', {'BTC': 1., 'LTC': 50.}), secret = 'secret').start()
+	yield simulator
+	simulator.stop()
+
+
+
+
+def test_signed_simulator_serves_public_and_private_requests(simulator):
+	bittrex = Bittrex(SECRETS, api_url = simulator.url)
+
+	for response in (bittrex.get_markets(), bittrex.get_currencies(), bittrex.get_market_summaries(),
+					bittrex.get_balances(), bittrex.get_open_orders('')):
+		assert response['success'], response['message']
+
+
+def test_signed_simulator_rejects_a_wrong_secret(simulator):
+	bittrex = Bittrex({'bittrex': {'api_key': 'key', 'api_secret': 'wrong'}}, api_url = simulator.url)
+
+	assert bittrex.get_markets()['success']
+	assert bittrex.get_balances()['message'] == 'INVALID_SIGNATURE'
+
+
+def test_trader_places_orders_in_a_signed_simulation(simulator):
+	trader = Trader(SECRETS, 'BTC-LTC', bittrex = Bittrex(SECRETS, api_url = simulator.url))
+
+	response = trader.place_sell(1., 2e-3)
+
+	assert response['success'], response['message']
+
+
+def test_portfolio_runs_against_the_simulator(simulator):
+	portfolio = Portfolio(SECRETS, ['BTC-LTC'], api_url = simulator.url)
+
+	average = portfolio.warmup(3, 'oneMin')
+	decisions = portfolio.tick()
+
+	assert average.ready
+	assert not portfolio.missing
+	assert decisions.tolist() == [0]
+
+
+def test_dispatcher_orders_take_the_trader_path(simulator):
+	bittrex = Bittrex(SECRETS, api_url = simulator.url)
+	dispatcher = Dispatcher(bittrex)
+
+	with dispatcher:
+		responses = dispatcher.place_orders([('BTC-LTC', 'sell', 1., 2e-3), ('BTC-LTC', 'sell', 2., 2e-3),
+											('BTC-NOPE', 'sell', 1., 2e-3), ('BTC-LTC', 'sell', float('nan'), 2e-3)])
+
+		assert [response['success'] for response in responses] == [True, True, False, False]
+		assert responses[2]['message'] == 'INVALID_MARKET'
+
+		# Held straight away, without waiting on a reconcile
+		assert dispatcher.ledger.available('LTC') == 47.
+		assert len(bittrex.get_open_orders('')['result']) == 2
+
+		cancelled = dispatcher.cancel_all()
+		assert len(cancelled) == 2 and all(response['success'] for response in cancelled.values())
@@ -0,0 +1,92 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Indicators import SMA, sma
+from Tester import Tester as HistoryTester
+import numpy as np
+import pandas as pd
+
+
+
+
+def old_trailing_average(times, prices, wallet, num):
+	"""
+	The iterrows loop Tester.trailingAverage used to run, without the prints
+
+	:return: <float> Final value, <int> Number of trades
+	"""
+
+	df = pd.DataFrame({'Time': times, 'Price': prices})
+	df['MA'] = df.iloc[:,1].rolling(window = num).mean()
+	holding = False
+	coinCount = 0
+	trades = 0
+
+	for index, row in df.iterrows():
+		currentVal = row.iloc[1]
+		currentAvg = row.iloc[2]
+
+		if currentVal > currentAvg and holding:
+			wallet += (currentVal * coinCount * .9975)
+			coinCount = 0
+			holding = not holding
+			trades += 1
+
+		elif currentVal < currentAvg and not holding:
+			numCoins = wallet / (currentVal * 1.0025)
+			wallet -= (numCoins * currentVal)
+			coinCount = numCoins
+			holding = not holding
+			trades += 1
+
+	return wallet + (coinCount * currentVal), trades
+
+
+def flat_prices(count = 20000, seed = 7):
+	"""
+	:return: <ndarray> 8 decimal prices with many stretches of the same price
+	"""
+
+	rng = np.random.default_rng(seed)
+	prices = np.round(1e-3 * np.exp(np.cumsum(rng.normal(0, .005, count))), 8)
+
+	for start in range(0, count, 40):
+		prices[start:start + rng.integers(1, 25)] = prices[start]
+
+	return prices
+
+
+
+
+def test_trailing_average_matches_old_loop_on_flat_prices():
+	prices = flat_prices()
+	times = 1500000000 + 300 * np.arange(len(prices))
+
+	for num in (3, 7, 12):
+		final, trades = old_trailing_average(times, prices, .08, num)
+
+		tester = HistoryTester(pd.DataFrame({'Price': prices}, index = times), .08)
+
+		assert tester.trailingAverage(num) == final
+		assert len(tester.ledger) == trades
+
+
+def test_sma_returns_the_price_for_flat_windows():
+	prices = flat_prices(5000)
+	flat = np.array([len(set(prices[row - 6:row + 1])) == 1 for row in range(6, len(prices))])
+
+	assert flat.any()
+	assert np.array_equal(sma(prices, 7)[6:][flat], prices[6:][flat])
+
+
+def test_sma_tick_matches_batch():
+	prices = flat_prices(5000)
+	prices[[100, 2000, 2001]] = np.nan
+
+	for num in (3, 12):
+		average = SMA(num)
+		ticks = np.array([average.update(price) for price in prices])
+
+		assert np.array_equal(ticks, sma(prices, num), equal_nan = True)
+		assert np.array_equal(ticks, pd.Series(prices).rolling(num).mean().to_numpy(), equal_nan = True)